@@ -4,7 +4,7 @@ PROJECT_DIR="/opt/starburger/star-burger"
 ENV_FILE="$PROJECT_DIR/.env"
 COMPOSE_FILE="$PROJECT_DIR/docker-compose.prod.yml"
 
-echo ">>> [1/7] Загружаем переменные окружения..."
+echo ">>> [1/8] Загружаем переменные окружения..."
 if [ -f "$ENV_FILE" ]; then
   set -a
   . "$ENV_FILE"
@@ -14,31 +14,36 @@ else
   exit 1
 fi
 
-echo ">>> [2/7] Обновляем код из GitHub..."
+echo ">>> [2/8] Обновляем код из GitHub..."
 cd "$PROJECT_DIR"
 git fetch --all
 git reset --hard origin/master
 
-echo ">>> [3/7] Собираем фронтенд..."
+echo ">>> [3/8] Собираем фронтенд..."
 docker compose -f "$COMPOSE_FILE" run --rm frontend || {
   echo "Ошибка при сборке фронтенда, продолжаем..."
 }
 
-echo ">>> [4/7] Пересобираем и перезапускаем контейнеры..."
+echo ">>> [4/8] Пересобираем и перезапускаем контейнеры..."
 docker compose -f "$COMPOSE_FILE" down
 docker compose -f "$COMPOSE_FILE" up -d --build
 
-echo ">>> [5/7] Применяем миграции..."
+echo ">>> [5/8] Применяем миграции..."
 docker compose -f "$COMPOSE_FILE" exec backend python manage.py migrate --noinput || {
   echo "Ошибка при миграции, продолжаем..."
 }
 
-echo ">>> [6/7] Собираем статику..."
+echo ">>> [6/8] Пересчитываем рестораны-кандидаты для открытых заказов..."
+docker compose -f "$COMPOSE_FILE" exec backend python manage.py rebuild_order_candidates || {
+  echo "Ошибка при пересчёте ресторанов-кандидатов, продолжаем..."
+}
+
+echo ">>> [7/8] Собираем статику..."
 docker compose -f "$COMPOSE_FILE" exec backend python manage.py collectstatic --noinput || {
   echo "Ошибка при сборке статики, продолжаем..."
 }
 
-echo ">>> [7/7] Проверяем статус контейнеров..."
+echo ">>> [8/8] Проверяем статус контейнеров..."
 docker compose -f "$COMPOSE_FILE" ps
 
 if [ -n "${ROLLBAR_ACCESS_TOKEN:-}" ]; then
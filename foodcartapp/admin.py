@@ -1,15 +1,19 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.shortcuts import reverse, redirect
 from django.templatetags.static import static
 from django.utils.html import format_html
 from django.utils.http import url_has_allowed_host_and_scheme
 
+from .models import Banner
 from .models import Product
 from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import Order
 from .models import OrderItem
+from utils.dispatch import dispatch_orders
+from utils.images import get_variant_url
+from utils.orders import refresh_order_candidates
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -33,6 +37,7 @@ class RestaurantAdmin(admin.ModelAdmin):
         'name',
         'address',
         'contact_phone',
+        'order_capacity',
     ]
     inlines = [
         RestaurantMenuItemInline
@@ -105,7 +110,8 @@ class ProductAdmin(admin.ModelAdmin):
         if not obj.image or not obj.id:
             return 'нет картинки'
         edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.image.url)
+        src = get_variant_url(obj.image_variants, 'thumbnail', 'webp') or obj.image.url
+        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=src)
     get_image_list_preview.short_description = 'превью'
 
 
@@ -114,12 +120,75 @@ class ProductAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'position',
+        'is_active',
+        'starts_at',
+        'ends_at',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'position',
+        'is_active',
+    ]
+    list_filter = [
+        'is_active',
+    ]
+    fields = [
+        'title',
+        'text',
+        'image',
+        'get_image_preview',
+        'position',
+        'is_active',
+        'starts_at',
+        'ends_at',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        src = get_variant_url(obj.image_variants, 'thumbnail', 'webp') or obj.image.url
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=src)
+    get_image_list_preview.short_description = 'превью'
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['id', 'firstname', 'lastname', 'phonenumber', 'address', 'created_at']
+    list_display = ['id', 'firstname', 'lastname', 'phonenumber', 'address', 'total_price', 'created_at']
     inlines = [OrderItemInline]
+    readonly_fields = ['total_price']
     search_fields = ['id', 'firstname', 'lastname', 'phonenumber', 'address']
     list_filter = ['created_at']
+    actions = ['dispatch_selected_orders']
+
+    @admin.action(description='Распределить необработанные заказы по ресторанам')
+    def dispatch_selected_orders(self, request, queryset):
+        assignments = dispatch_orders(queryset)
+        self.message_user(
+            request,
+            f'Распределено заказов: {len(assignments)}',
+            messages.SUCCESS if assignments else messages.WARNING,
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_order_candidates([form.instance.id])
 
     def response_change(self, request, obj):
         next_url = request.GET.get('next')
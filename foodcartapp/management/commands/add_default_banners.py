@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner
+
+
+DEFAULT_BANNERS = [
+    ('Burger', 'burger.jpg', 'Tasty Burger at your door step'),
+    ('Spices', 'food.jpg', 'All Cuisines'),
+    ('New York', 'tasty.jpg', 'Food is incomplete without a tasty dessert'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Добавляет стандартные баннеры из assets, если баннеров ещё нет'
+
+    def handle(self, *args, **options):
+        if Banner.objects.exists():
+            self.stdout.write('Баннеры уже есть, ничего не добавлено')
+            return
+
+        banners_count = 0
+        for position, (title, filename, text) in enumerate(DEFAULT_BANNERS):
+            path = os.path.join(settings.BASE_DIR, 'assets', filename)
+            if not os.path.exists(path):
+                continue
+            # Картинка могла остаться от прошлого запуска, второй копии не нужно
+            image_name = f'banners/{filename}'
+            if not default_storage.exists(image_name):
+                with open(path, 'rb') as image_file:
+                    image_name = default_storage.save(image_name, File(image_file))
+            Banner.objects.create(title=title, text=text, image=image_name, position=position)
+            banners_count += 1
+        self.stdout.write(f'Добавлено баннеров: {banners_count}')
@@ -0,0 +1,59 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from geopy.distance import geodesic
+
+from utils.distances import DISTANCE_MODES, get_distance_matrix
+
+
+MOSCOW_BOUNDS = ((55.55, 55.95), (37.35, 37.85))
+
+
+def get_random_points(count):
+    (min_lat, max_lat), (min_lon, max_lon) = MOSCOW_BOUNDS
+    return [
+        (random.uniform(min_lat, max_lat), random.uniform(min_lon, max_lon))
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает попарный geodesic с матричным расчётом расстояний'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=3000)
+        parser.add_argument('--restaurants', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        orders = get_random_points(options['orders'])
+        restaurants = get_random_points(options['restaurants'])
+
+        started_at = time.perf_counter()
+        reference = [
+            [geodesic(order, restaurant).kilometers for restaurant in restaurants]
+            for order in orders
+        ]
+        baseline = time.perf_counter() - started_at
+        self.stdout.write(
+            f'{len(orders)} заказов x {len(restaurants)} ресторанов, '
+            f'попарный geodesic: {baseline:.3f} с'
+        )
+
+        for mode in DISTANCE_MODES:
+            started_at = time.perf_counter()
+            matrix = get_distance_matrix(orders, restaurants, mode=mode)
+            elapsed = time.perf_counter() - started_at
+
+            max_error = max(
+                abs(distance - expected) / expected
+                for row, expected_row in zip(matrix, reference)
+                for distance, expected in zip(row, expected_row)
+                if expected
+            )
+            self.stdout.write(
+                f'{mode:>16}: {elapsed:.3f} с, ускорение x{baseline / elapsed:.1f}, '
+                f'макс. ошибка {max_error:.3%}'
+            )
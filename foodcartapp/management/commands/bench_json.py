@@ -0,0 +1,45 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+from foodcartapp.models import Order
+from foodcartapp.renderers import FastJSONRenderer
+from foodcartapp.serializers import OrderReadSerializer
+from utils.catalog import dump_products
+from utils.json_encoding import fast_dumps
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время сериализации и размер ответов API для разных JSON-рендереров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def measure(self, title, serialize, data):
+        started_at = time.perf_counter()
+        for _ in range(self.repeat):
+            payload = serialize(data)
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            f'  {title:>24}: {elapsed / self.repeat * 1e6:8.1f} мкс, {len(payload)} байт'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        payloads = {
+            '/api/products/': dump_products(),
+            '/api/order/ (ответ DRF)': [OrderReadSerializer(order).data for order in Order.objects.all()[:1]],
+        }
+        for title, data in payloads.items():
+            self.stdout.write(title)
+            self.measure(
+                'json, indent=4',
+                lambda data: json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4).encode('utf-8'),
+                data,
+            )
+            self.measure('DRF JSONRenderer', JSONRenderer().render, data)
+            self.measure('orjson, компактный', fast_dumps, data)
+            self.measure('FastJSONRenderer', FastJSONRenderer().render, data)
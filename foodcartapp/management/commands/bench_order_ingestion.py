@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+
+from foodcartapp.models import Order, Product
+from foodcartapp.views import RegisterOrderView
+from utils.order_journal import drain_order_journal, get_pending_count
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность POST /api/order/ в обычном режиме и с журналом заказов. '
+        'Созданные заказы в конце удаляются'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500)
+        parser.add_argument('--items', type=int, default=3, help='Позиций в каждом заказе')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def post_orders(self, body):
+        factory = RequestFactory()
+        view = RegisterOrderView.as_view()
+
+        def post_order(_):
+            try:
+                response = view(factory.post('/api/order/', body, content_type='application/json'))
+                return response.status_code
+            except Exception as error:
+                return type(error).__name__
+            finally:
+                connection.close()
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.options['threads']) as executor:
+            statuses = list(executor.map(post_order, range(self.options['orders'])))
+        elapsed = time.perf_counter() - started_at
+
+        failures = [status for status in statuses if status not in (201, 202)]
+        return elapsed, failures
+
+    def report(self, title, count, elapsed, failures=()):
+        failures_note = f', ошибок: {len(failures)} ({", ".join(sorted(set(map(str, failures))))})' if failures else ''
+        self.stdout.write(f'{title:>36}: {count / elapsed:8.1f} заказов/с{failures_note}')
+
+    def handle(self, *args, **options):
+        self.options = options
+        product_ids = list(Product.objects.available().values_list('id', flat=True)[:options['items']])
+        if not product_ids:
+            raise CommandError('Нет товаров в продаже, заказывать нечего')
+        body = json.dumps({
+            'firstname': 'Нагрузочный',
+            'lastname': 'Тест',
+            'phonenumber': '+79160000000',
+            'address': 'Москва, Красная площадь, 1',
+            'products': [{'product': product_id, 'quantity': 1} for product_id in product_ids],
+        })
+        last_order_id = Order.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.stdout.write(
+            f'{options["orders"]} заказов по {len(product_ids)} позиции, потоков: {options["threads"]}'
+        )
+
+        try:
+            with override_settings(ORDER_BUFFERED_INGESTION=False):
+                elapsed, failures = self.post_orders(body)
+            self.report('обычный режим (201)', options['orders'], elapsed, failures)
+
+            with tempfile.TemporaryDirectory() as journal_dir:
+                journal_path = os.path.join(journal_dir, 'orders.sqlite3')
+                with override_settings(ORDER_BUFFERED_INGESTION=True, ORDER_JOURNAL_PATH=journal_path):
+                    elapsed, failures = self.post_orders(body)
+                    self.report('журнал: приём (202)', options['orders'], elapsed, failures)
+
+                    started_at = time.perf_counter()
+                    drained_count = 0
+                    while get_pending_count():
+                        drained_count += len(drain_order_journal(options['batch_size']))
+                    self.report(
+                        f'журнал: перенос в базу по {options["batch_size"]}',
+                        drained_count,
+                        time.perf_counter() - started_at,
+                    )
+        finally:
+            Order.objects.filter(id__gt=last_order_id, lastname='Тест').delete()
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from foodcartapp.views import product_list_api
+from utils.catalog import invalidate_catalog
+
+
+class Command(BaseCommand):
+    help = 'Замеряет, сколько запросов в секунду выдерживает /api/products/ с кэшем и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def measure(self, title, make_request, before_request=None):
+        requests_count = self.options['requests']
+        started_at = time.perf_counter()
+        for _ in range(requests_count):
+            if before_request:
+                before_request()
+            response = product_list_api(make_request())
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            f'{title:>28}: {requests_count / elapsed:8.1f} запросов/с, '
+            f'ответ {response.status_code}, {len(response.content)} байт'
+        )
+        return response
+
+    def handle(self, *args, **options):
+        self.options = options
+        factory = RequestFactory()
+
+        self.measure(
+            'без кэша (сборка на каждый)',
+            lambda: factory.get('/api/products/'),
+            before_request=invalidate_catalog,
+        )
+        response = self.measure('из кэша', lambda: factory.get('/api/products/'))
+        self.measure(
+            'повтор с If-None-Match',
+            lambda: factory.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag']),
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from utils.dispatch import dispatch_orders
+
+
+class Command(BaseCommand):
+    help = 'Распределяет необработанные заказы по ближайшим ресторанам с учётом их загрузки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать распределение, не сохраняя его',
+        )
+
+    def handle(self, *args, **options):
+        assignments = dispatch_orders(dry_run=options['dry_run'])
+        for order, restaurant_id, distance in assignments:
+            distance = f'{distance} км' if distance is not None else 'расстояние неизвестно'
+            self.stdout.write(f'Заказ {order.id} -> ресторан {restaurant_id} ({distance})')
+        self.stdout.write(f'Распределено заказов: {len(assignments)}')
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.order_journal import drain_order_journal, get_pending_count, get_rejected_orders, purge_drained
+
+
+class Command(BaseCommand):
+    help = 'Переносит заказы из журнала ORDER_JOURNAL_PATH в базу пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Сколько секунд ждать новых заказов, если журнал пуст',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Перенести все накопившиеся заказы и выйти',
+        )
+        parser.add_argument(
+            '--keep-drained',
+            type=int,
+            default=7 * 24 * 60 * 60,
+            help='Сколько секунд хранить в журнале уже перенесённые заказы',
+        )
+        parser.add_argument(
+            '--rejected',
+            action='store_true',
+            help='Показать отклонённые заказы, с клиентами которых нужно связаться, и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['rejected']:
+            rejected_orders = get_rejected_orders()
+            if not rejected_orders:
+                self.stdout.write('Отклонённых заказов нет')
+            for tracking_id, order_data, reason in rejected_orders:
+                self.stdout.write(
+                    f'{tracking_id}: {order_data["firstname"]} {order_data["lastname"]}, '
+                    f'{order_data["phonenumber"]}, {order_data["address"]}. {reason}'
+                )
+            return
+
+        purge_drained(options['keep_drained'])
+        while True:
+            started_at = time.monotonic()
+            order_ids = drain_order_journal(options['batch_size'])
+            # Пачка могла целиком состоять из отклонённых заказов, поэтому
+            # смотрим на остаток журнала, а не на число созданных заказов
+            pending_count = get_pending_count()
+            if order_ids:
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f'Перенесено заказов: {len(order_ids)} за {elapsed:.2f} с, '
+                    f'в журнале осталось: {pending_count}'
+                )
+            if pending_count:
+                continue
+
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
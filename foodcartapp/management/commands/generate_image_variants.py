@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Banner, Product
+from utils.banners import invalidate_banners
+from utils.catalog import invalidate_catalog
+
+
+class Command(BaseCommand):
+    help = 'Нарезает уменьшенные копии картинок товаров и баннеров в WebP и JPEG'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перенарезать и уже нарезанные картинки',
+        )
+
+    def handle(self, *args, **options):
+        products_count = self.refresh_variants(Product, options['force'])
+        if products_count:
+            invalidate_catalog()
+        banners_count = self.refresh_variants(Banner, options['force'])
+        if banners_count:
+            invalidate_banners()
+        self.stdout.write(f'Нарезаны картинки для {products_count} товаров и {banners_count} баннеров')
+
+    def refresh_variants(self, model, force):
+        objects = model.objects.exclude(image='')
+        if not force:
+            objects = objects.filter(image_variants={})
+
+        processed_count = 0
+        for obj in objects.iterator():
+            try:
+                obj.refresh_image_variants()
+            except OSError as error:
+                self.stderr.write(f'{obj}: не удалось нарезать картинку {obj.image.name}: {error}')
+                continue
+            processed_count += 1
+        return processed_count
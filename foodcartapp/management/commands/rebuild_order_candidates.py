@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from utils.orders import refresh_open_orders_candidates
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рестораны-кандидаты для всех незавершённых заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        orders_count = refresh_open_orders_candidates(batch_size=options['batch_size'])
+        self.stdout.write(f'Пересчитаны рестораны-кандидаты для {orders_count} заказов')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённую сумму заказов по ценам позиций'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        order_ids = list(Order.objects.order_by('id').values_list('id', flat=True))
+        updated_count = 0
+        for start in range(0, len(order_ids), options['batch_size']):
+            batch_ids = order_ids[start:start + options['batch_size']]
+            updated_count += Order.objects.filter(pk__in=batch_ids).recalculate_total_price()
+        self.stdout.write(f'Пересчитана сумма для {updated_count} заказов')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает, в скольких ресторанах продаётся каждый товар, и исправляет расхождения'
+
+    def handle(self, *args, **options):
+        stored_counts = dict(Product.objects.values_list('id', 'available_restaurants_count'))
+        Product.objects.all().recount_availability()
+        actual_counts = dict(Product.objects.values_list('id', 'available_restaurants_count'))
+
+        drifted_product_ids = [
+            product_id
+            for product_id, count in actual_counts.items()
+            if stored_counts.get(product_id) != count
+        ]
+        if drifted_product_ids:
+            from utils.catalog import invalidate_catalog
+
+            invalidate_catalog()
+        self.stdout.write(
+            f'Проверено товаров: {len(actual_counts)}, исправлено: {len(drifted_product_ids)}'
+        )
+        for product_id in drifted_product_ids:
+            self.stdout.write(
+                f'  товар {product_id}: было {stored_counts[product_id]}, стало {actual_counts[product_id]}'
+            )
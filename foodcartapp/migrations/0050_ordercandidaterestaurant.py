@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0049_alter_orderitem_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCandidateRestaurant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.FloatField(blank=True, null=True, verbose_name='расстояние, км')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_restaurants', to='foodcartapp.order', verbose_name='заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidate_orders', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'ресторан-кандидат для заказа',
+                'verbose_name_plural': 'рестораны-кандидаты для заказов',
+                'ordering': [models.OrderBy(models.F('distance'), nulls_last=True), 'id'],
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+    ]
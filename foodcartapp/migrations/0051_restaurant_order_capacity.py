@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0050_ordercandidaterestaurant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='order_capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Сколько заказов ресторан готовит одновременно. Пусто — без ограничений', null=True, verbose_name='одновременных заказов'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0054_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='заголовок')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('image', models.ImageField(upload_to='banners', verbose_name='картинка')),
+                ('image_variants', models.JSONField(blank=True, default=dict, editable=False, verbose_name='уменьшенные копии картинки')),
+                ('position', models.PositiveIntegerField(db_index=True, default=0, verbose_name='порядок')),
+                ('is_active', models.BooleanField(default=True, verbose_name='показывать')),
+                ('starts_at', models.DateTimeField(blank=True, null=True, verbose_name='показывать с')),
+                ('ends_at', models.DateTimeField(blank=True, null=True, verbose_name='показывать до')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['position', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0057_orderidempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='tracking_id',
+            field=models.CharField(blank=True, editable=False, help_text='Заполняется у заказов, принятых через журнал при ORDER_BUFFERED_INGESTION', max_length=32, null=True, unique=True, verbose_name='номер в журнале заказов'),
+        ),
+        migrations.AlterField(
+            model_name='orderidempotencykey',
+            name='order',
+            field=models.ForeignKey(blank=True, help_text='Пусто, пока заказ ждёт в журнале заказов', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to='foodcartapp.order', verbose_name='заказ'),
+        ),
+    ]
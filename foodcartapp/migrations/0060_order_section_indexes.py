@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0059_order_total_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'unprocessed')), fields=['-created_at', '-id'], name='order_unprocessed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['confirmed', 'preparing', 'delivering'])), fields=['-created_at', '-id'], name='order_active_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+from utils.addresses import normalize_address
+
+
+def fill_normalized_addresses(apps, schema_editor):
+    for model_name in ('Restaurant', 'Order'):
+        model = apps.get_model('foodcartapp', model_name)
+        objects = list(model.objects.only('id', 'address'))
+        for obj in objects:
+            obj.normalized_address = normalize_address(obj.address)
+        model.objects.bulk_update(objects, ['normalized_address'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_order_section_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='normalized_address',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='нормализованный адрес'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='normalized_address',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, verbose_name='нормализованный адрес'),
+        ),
+        migrations.RunPython(fill_normalized_addresses, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,10 +1,21 @@
+from django.conf import settings
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from phonenumber_field.modelfields import PhoneNumberField
 
-from django.db.models import Sum, F
-from collections import Counter
-from geopy.distance import geodesic
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from utils.addresses import normalize_address
+from utils.images import generate_image_variants
+
+
+# Шлётся с product_ids, когда пункты меню меняются в обход save() и delete():
+# через QuerySet.update() или bulk_create()
+menu_items_changed = Signal()
 
 
 class Restaurant(models.Model):
@@ -17,6 +28,13 @@ class Restaurant(models.Model):
         max_length=100,
         blank=True,
     )
+    normalized_address = models.CharField(
+        'нормализованный адрес',
+        max_length=255,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
     contact_phone = models.CharField(
         'контактный телефон',
         max_length=50,
@@ -28,23 +46,41 @@ class Restaurant(models.Model):
         blank=True,
         help_text='Широта и долгота в формате [lat, lon]'
     )
+    order_capacity = models.PositiveIntegerField(
+        'одновременных заказов',
+        null=True,
+        blank=True,
+        help_text='Сколько заказов ресторан готовит одновременно. Пусто — без ограничений'
+    )
 
     class Meta:
         verbose_name = 'ресторан'
         verbose_name_plural = 'рестораны'
 
+    def save(self, *args, **kwargs):
+        self.normalized_address = normalize_address(self.address)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
+        return self.filter(available_restaurants_count__gt=0)
+
+    def recount_availability(self):
+        available_restaurants_count = (
             RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+            .filter(product=OuterRef('pk'), availability=True)
+            .order_by()
+            .values('product')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        return self.update(
+            available_restaurants_count=Coalesce(Subquery(available_restaurants_count), 0)
         )
-        return self.filter(pk__in=products)
 
 
 class ProductCategory(models.Model):
@@ -83,6 +119,12 @@ class Product(models.Model):
     image = models.ImageField(
         'картинка'
     )
+    image_variants = models.JSONField(
+        'уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     special_status = models.BooleanField(
         'спец.предложение',
         default=False,
@@ -93,16 +135,57 @@ class Product(models.Model):
         max_length=200,
         blank=True,
     )
+    available_restaurants_count = models.PositiveIntegerField(
+        'в продаже в ресторанах',
+        default=0,
+        db_index=True,
+        editable=False,
+        help_text='Обновляется автоматически при изменении меню ресторанов'
+    )
 
     objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'товар'
         verbose_name_plural = 'товары'
+        indexes = [
+            models.Index(fields=['category', 'special_status']),
+        ]
 
     def __str__(self):
         return self.name
 
+    def refresh_image_variants(self):
+        self.image_variants = generate_image_variants(
+            self.image,
+            upload_to='product_variants',
+        ) if self.image else {}
+        Product.objects.filter(pk=self.pk).update(image_variants=self.image_variants)
+
+
+class RestaurantMenuItemQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        changed_items = dict(self.values_list('pk', 'product_id'))
+        updated_count = super().update(**kwargs)
+
+        product_ids = set(changed_items.values())
+        if 'product' in kwargs or 'product_id' in kwargs:
+            product_ids |= set(
+                RestaurantMenuItem.objects
+                .filter(pk__in=changed_items)
+                .values_list('product_id', flat=True)
+            )
+        if product_ids:
+            menu_items_changed.send(sender=RestaurantMenuItem, product_ids=product_ids)
+        return updated_count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        product_ids = {obj.product_id for obj in objs}
+        if product_ids:
+            menu_items_changed.send(sender=RestaurantMenuItem, product_ids=product_ids)
+        return objs
+
 
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
@@ -123,6 +206,8 @@ class RestaurantMenuItem(models.Model):
         db_index=True
     )
 
+    objects = RestaurantMenuItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'пункт меню ресторана'
         verbose_name_plural = 'пункты меню ресторана'
@@ -134,11 +219,102 @@ class RestaurantMenuItem(models.Model):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+class BannerQuerySet(models.QuerySet):
+    def active(self, now=None):
+        now = now or timezone.now()
+        return self.filter(
+            Q(starts_at__isnull=True) | Q(starts_at__lte=now),
+            Q(ends_at__isnull=True) | Q(ends_at__gt=now),
+            is_active=True,
+        )
+
+    def next_change_at(self, now=None):
+        """Ближайший момент, когда баннер появится или пропадёт по расписанию."""
+        now = now or timezone.now()
+        boundaries = [
+            self.filter(is_active=True, **{f'{field}__gt': now})
+            .order_by(field)
+            .values_list(field, flat=True)
+            .first()
+            for field in ('starts_at', 'ends_at')
+        ]
+        boundaries = [boundary for boundary in boundaries if boundary]
+        return min(boundaries) if boundaries else None
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50,
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True,
+    )
+    image = models.ImageField(
+        'картинка',
+        upload_to='banners',
+    )
+    image_variants = models.JSONField(
+        'уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    position = models.PositiveIntegerField(
+        'порядок',
+        default=0,
+        db_index=True,
+    )
+    is_active = models.BooleanField(
+        'показывать',
+        default=True,
+    )
+    starts_at = models.DateTimeField(
+        'показывать с',
+        null=True,
+        blank=True,
+    )
+    ends_at = models.DateTimeField(
+        'показывать до',
+        null=True,
+        blank=True,
+    )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['position', 'id']
+
+    def __str__(self):
+        return self.title
+
+    def refresh_image_variants(self):
+        self.image_variants = generate_image_variants(
+            self.image,
+            upload_to='banner_variants',
+        ) if self.image else {}
+        Banner.objects.filter(pk=self.pk).update(image_variants=self.image_variants)
+
+
 class OrderQuerySet(models.QuerySet):
-    def with_total_price(self):
-        return self.annotate(
-            total_price=Sum(
-                F('items__quantity') * F('items__product__price')
+    def recalculate_total_price(self):
+        total_price = (
+            OrderItem.objects
+            .filter(order=OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(total=Sum(F('quantity') * F('price')))
+            .values('total')
+        )
+        return self.update(
+            total_price=Coalesce(
+                Subquery(total_price),
+                Value(0),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
             )
         )
 
@@ -190,10 +366,34 @@ class Order(models.Model):
     lastname = models.CharField('Фамилия', max_length=30, db_index=True)
     phonenumber = PhoneNumberField('Телефон', db_index=True)
     address = models.CharField('Адрес', max_length=200)
+    normalized_address = models.CharField(
+        'нормализованный адрес',
+        max_length=255,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
     created_at = models.DateTimeField('Создан', auto_now_add=True, db_index=True)
     called_at = models.DateTimeField('Дата звонка', null=True, blank=True)
     delivered_at = models.DateTimeField('Дата доставки', null=True, blank=True)
     comment = models.TextField('Комментарий', blank=True)
+    total_price = models.DecimalField(
+        'сумма заказа',
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Пересчитывается автоматически при изменении позиций заказа',
+    )
+    tracking_id = models.CharField(
+        'номер в журнале заказов',
+        max_length=32,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text='Заполняется у заказов, принятых через журнал при ORDER_BUFFERED_INGESTION',
+    )
 
     objects = OrderQuerySet.as_manager()
 
@@ -201,55 +401,95 @@ class Order(models.Model):
         verbose_name = 'заказ'
         verbose_name_plural = 'заказы'
         ordering = ['-created_at']
+        indexes = [
+            # Разделы страницы заказов менеджера: свежие заказы сверху
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='order_unprocessed_idx',
+                condition=models.Q(status='unprocessed'),
+            ),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='order_active_idx',
+                condition=models.Q(status__in=['confirmed', 'preparing', 'delivering']),
+            ),
+        ]
 
-    def get_possible_restaurants(self, restaurant_menu_items, restaurants, coordinates=None):
+    def get_possible_restaurants(self, menu_index, restaurants, coordinates=None, restaurant_grid=None,
+                                 known_distances=None, limit=None):
         order_product_ids = {item.product_id for item in self.items.all()}
+        full_restaurant_ids = menu_index.get_restaurant_ids(order_product_ids)
+        if limit is None:
+            limit = settings.NEAREST_RESTAURANTS_LIMIT
+
+        nearest_restaurants = []
+        if coordinates and restaurant_grid:
+            nearest_restaurants = restaurant_grid.find_nearest(
+                coordinates,
+                set(full_restaurant_ids),
+                limit=limit,
+                radius_km=settings.NEAREST_RESTAURANTS_RADIUS_KM,
+                known_distances=known_distances,
+            )
 
-        restaurant_product_counts = Counter(
-            menu_item['restaurant_id']
-            for menu_item in restaurant_menu_items
-            if menu_item['product_id'] in order_product_ids
-        )
-
-        full_restaurant_ids = [
-            restaurant_id
-            for restaurant_id, count in restaurant_product_counts.items()
-            if count == len(order_product_ids)
+        located_restaurant_ids = set(restaurant_grid.restaurant_points) if restaurant_grid else set()
+        unlocated_restaurants = [
+            (restaurant_id, None)
+            for restaurant_id in full_restaurant_ids
+            if restaurant_id not in located_restaurant_ids or not coordinates
         ]
 
         possible_restaurants = []
-        for restaurant_id in full_restaurant_ids:
+        for restaurant_id, distance_km in nearest_restaurants + unlocated_restaurants:
             restaurant = restaurants.get(restaurant_id)
             restaurant_name = getattr(restaurant, 'name', 'Неизвестный ресторан')
-            restaurant_coordinates = getattr(restaurant, 'coordinates', None)
-
-            distance_km = None
-            if coordinates and restaurant_coordinates:
-                try:
-                    client_coords = tuple(map(float, coordinates))
-                    rest_coords = tuple(map(float, restaurant_coordinates))
-                    distance_km = round(geodesic(client_coords, rest_coords).kilometers, 2)
-                except Exception as error:
-                    print(f"Ошибка расчёта расстояния для заказа {self.id}: {error}")
 
             possible_restaurants.append({
                 'id': restaurant_id,
                 'name': restaurant_name,
-                'distance': distance_km
+                'distance': round(distance_km, 2) if distance_km is not None else None
             })
 
-        possible_restaurants.sort(key=lambda x: x['distance'] if x['distance'] is not None else 999999)
-        return possible_restaurants
+        return possible_restaurants[:limit] if limit else possible_restaurants
 
     def save(self, *args, **kwargs):
         if self.cooking_restaurant and self.status == self.STATUS_UNPROCESSED:
             self.status = self.STATUS_PREPARING
+        self.normalized_address = normalize_address(self.address)
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            # Сумму ведут позиции заказа, а в загруженном объекте она могла устареть
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'total_price'
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Заказ {self.id} от {self.firstname} {self.lastname} ({self.created_at})"
 
 
+class OrderItemQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        changed_items = dict(self.values_list('pk', 'order_id'))
+        updated_count = super().update(**kwargs)
+
+        order_ids = set(changed_items.values())
+        if 'order' in kwargs or 'order_id' in kwargs:
+            order_ids |= set(
+                OrderItem.objects
+                .filter(pk__in=changed_items)
+                .values_list('order_id', flat=True)
+            )
+        Order.objects.filter(pk__in=order_ids).recalculate_total_price()
+        return updated_count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Order.objects.filter(pk__in={obj.order_id for obj in objs}).recalculate_total_price()
+        return objs
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(
         Order,
@@ -271,6 +511,8 @@ class OrderItem(models.Model):
         validators=[MinValueValidator(0)]
     )
 
+    objects = OrderItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'позиция заказа'
         verbose_name_plural = 'позиция заказа'
@@ -282,3 +524,72 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} (x{self.quantity})"
+
+
+class OrderCandidateRestaurant(models.Model):
+    order = models.ForeignKey(
+        Order,
+        related_name='candidate_restaurants',
+        verbose_name='заказ',
+        on_delete=models.CASCADE,
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='candidate_orders',
+        verbose_name='ресторан',
+        on_delete=models.CASCADE,
+    )
+    distance = models.FloatField(
+        'расстояние, км',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'ресторан-кандидат для заказа'
+        verbose_name_plural = 'рестораны-кандидаты для заказов'
+        ordering = [F('distance').asc(nulls_last=True), 'id']
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} - {self.restaurant_id}"
+
+
+class OrderIdempotencyKey(models.Model):
+    key = models.CharField(
+        'ключ',
+        max_length=255,
+        unique=True,
+    )
+    request_hash = models.CharField(
+        'хэш запроса',
+        max_length=64,
+    )
+    order = models.ForeignKey(
+        Order,
+        related_name='idempotency_keys',
+        verbose_name='заказ',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text='Пусто, пока заказ ждёт в журнале заказов',
+    )
+    response_status = models.PositiveSmallIntegerField('код ответа')
+    response_body = models.JSONField(
+        'тело ответа',
+        encoder=DjangoJSONEncoder,
+    )
+    created_at = models.DateTimeField(
+        'создан',
+        default=timezone.now,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности заказа'
+        verbose_name_plural = 'ключи идемпотентности заказов'
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,14 @@
+from rest_framework.renderers import BaseRenderer
+
+from utils.json_encoding import fast_dumps
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return fast_dumps(data)
@@ -3,15 +3,39 @@ from django.db import transaction
 from phonenumber_field.serializerfields import PhoneNumberField
 
 from .models import Product, Order, OrderItem
+from utils.geocoding_queue import enqueue_unknown_addresses
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        """Проверяет товары всех позиций одним запросом и подставляет их вместо id."""
+        items = super().to_internal_value(data)
+
+        products = Product.objects.only('id', 'price').in_bulk(
+            {item['product'] for item in items}
+        )
+        does_not_exist = serializers.PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+        errors = [
+            {} if item['product'] in products
+            else {'product': [does_not_exist.format(pk_value=item['product'])]}
+            for item in items
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item in items:
+            item['product'] = products[item['product']]
+        return items
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
+    product = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = OrderItem
         fields = ['product', 'quantity']
+        list_serializer_class = OrderItemListSerializer
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
@@ -22,12 +46,37 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['firstname', 'lastname', 'phonenumber', 'address', 'products']
 
+    def get_journal_data(self):
+        """Проверенный заказ в виде, пригодном для JSON-журнала заказов."""
+        return {
+            'firstname': self.validated_data['firstname'],
+            'lastname': self.validated_data['lastname'],
+            'phonenumber': self.validated_data['phonenumber'].as_e164,
+            'address': self.validated_data['address'],
+            'products': [
+                {
+                    'product': product_item['product'].id,
+                    'quantity': product_item['quantity'],
+                    'price': product_item['product'].price,
+                }
+                for product_item in self.validated_data['products']
+            ],
+        }
+
     def create(self, validated_order):
         products = validated_order.pop('products')
         with transaction.atomic():
             order = Order.objects.create(**validated_order)
-            for product_item in products:
-                OrderItem.objects.create(order=order, **product_item)
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=product_item['product'],
+                    quantity=product_item['quantity'],
+                    price=product_item['product'].price,
+                )
+                for product_item in products
+            ])
+            enqueue_unknown_addresses([order.address])
         return order
 
 
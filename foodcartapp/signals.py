@@ -0,0 +1,145 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from places.models import PlaceDistance
+from .models import (
+    Banner,
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuItem,
+    menu_items_changed,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_candidates_on_commit(orders=None):
+    from utils.orders import refresh_open_orders_candidates
+
+    transaction.on_commit(lambda: refresh_open_orders_candidates(orders))
+
+
+@receiver(pre_save, sender=Restaurant)
+def remember_restaurant_location(sender, instance, **kwargs):
+    previous_location = (
+        Restaurant.objects
+        .filter(pk=instance.pk)
+        .values('address', 'coordinates')
+        .first()
+    ) if instance.pk else None
+    instance._location_changed = previous_location != {
+        'address': instance.address,
+        'coordinates': instance.coordinates,
+    }
+
+
+@receiver(post_save, sender=Restaurant)
+def refresh_candidates_on_restaurant_move(sender, instance, **kwargs):
+    if getattr(instance, '_location_changed', True):
+        PlaceDistance.objects.filter(restaurant=instance).delete()
+        refresh_candidates_on_commit()
+
+
+@receiver(post_delete, sender=Restaurant)
+def refresh_candidates_on_restaurant_delete(sender, instance, **kwargs):
+    refresh_candidates_on_commit()
+
+
+@receiver(pre_save, sender=RestaurantMenuItem)
+def remember_menu_item_state(sender, instance, **kwargs):
+    previous_state = (
+        RestaurantMenuItem.objects
+        .filter(pk=instance.pk)
+        .values('availability', 'product_id')
+        .first()
+    ) if instance.pk else None
+    instance._previous_product_id = previous_state['product_id'] if previous_state else None
+    instance._availability_changed = previous_state != {
+        'availability': instance.availability,
+        'product_id': instance.product_id,
+    }
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+def handle_menu_item_save(sender, instance, **kwargs):
+    if instance._availability_changed:
+        product_ids = {instance.product_id, instance._previous_product_id} - {None}
+        menu_items_changed.send(sender=RestaurantMenuItem, product_ids=product_ids)
+
+
+@receiver(post_delete, sender=RestaurantMenuItem)
+def handle_menu_item_delete(sender, instance, **kwargs):
+    if instance.availability:
+        menu_items_changed.send(sender=RestaurantMenuItem, product_ids={instance.product_id})
+
+
+@receiver(menu_items_changed)
+def update_product_availability(sender, product_ids, **kwargs):
+    from utils.catalog import invalidate_catalog
+
+    Product.objects.filter(pk__in=product_ids).recount_availability()
+    transaction.on_commit(invalidate_catalog)
+    refresh_candidates_on_commit(
+        Order.objects.filter(items__product_id__in=product_ids)
+    )
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def recalculate_order_total_price(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).recalculate_total_price()
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Banner)
+def remember_image(sender, instance, **kwargs):
+    previous_image = (
+        sender.objects
+        .filter(pk=instance.pk)
+        .values_list('image', flat=True)
+        .first()
+    ) if instance.pk else None
+    instance._image_changed = previous_image != instance.image.name or not instance.image_variants
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Banner)
+def generate_image_variants_on_upload(sender, instance, **kwargs):
+    if not getattr(instance, '_image_changed', False):
+        return
+    try:
+        instance.refresh_image_variants()
+    except OSError:
+        logger.warning(
+            'Не удалось нарезать картинку (%s, id %s)',
+            sender._meta.verbose_name,
+            instance.pk,
+            exc_info=True,
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog_on_change(sender, **kwargs):
+    from utils.catalog import invalidate_catalog
+
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners_on_change(sender, **kwargs):
+    from utils.banners import invalidate_banners
+
+    transaction.on_commit(invalidate_banners)
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import product_list_api, banners_list_api, RegisterOrderView
+from .views import product_list_api, banners_list_api, OrderTrackingView, RegisterOrderView
 
 
 app_name = "foodcartapp"
@@ -9,4 +9,5 @@ urlpatterns = [
     path('products/', product_list_api),
     path('banners/', banners_list_api),
     path('order/', RegisterOrderView.as_view()),
+    path('order/<str:tracking_id>/', OrderTrackingView.as_view()),
 ]
@@ -1,74 +1,161 @@
-from django.http import JsonResponse, HttpResponse
-from django.templatetags.static import static
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Product
+from .models import Order, OrderIdempotencyKey
 from .serializers import OrderCreateSerializer, OrderReadSerializer
 from django.shortcuts import render
+from utils.banners import get_banners_payload
+from utils.catalog import get_catalog_payload, parse_catalog_query
+from utils.idempotency import (
+    IDEMPOTENCY_KEY_HEADER,
+    delete_expired_idempotency_keys,
+    find_idempotency_key,
+    get_request_hash,
+)
+from utils.json_encoding import dumps
+from utils.order_journal import append_order, get_rejected_reason, is_pending
+from utils.orders import refresh_order_candidates
+
+
+logger = logging.getLogger(__name__)
 
 
 def index(request):
     return HttpResponse("OK")
 
 
+def make_cached_json_response(request, payload, etag):
+    etag = f'"{etag}"'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE)
+    return response
+
+
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    payload, etag = get_banners_payload()
+    return make_cached_json_response(request, payload, etag)
 
 
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    try:
+        query = parse_catalog_query(request.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(dumps({'error': str(error)}), content_type='application/json')
+
+    payload, etag = get_catalog_payload(query)
+    return make_cached_json_response(request, payload, etag)
 
 
 class RegisterOrderView(APIView):
     def post(self, request):
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            return self.create_order(request)
+
+        max_key_length = OrderIdempotencyKey._meta.get_field('key').max_length
+        if not 0 < len(idempotency_key) <= max_key_length:
+            return Response(
+                {'error': f'{IDEMPOTENCY_KEY_HEADER} должен быть длиной от 1 до {max_key_length} символов'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = get_request_hash(request.data)
+        stored_key = find_idempotency_key(idempotency_key)
+        if stored_key is None:
+            try:
+                return self.create_order(request, idempotency_key, request_hash)
+            except IntegrityError:
+                # Параллельный запрос с тем же ключом успел создать заказ раньше,
+                # наша транзакция откатилась целиком — отдаём его ответ
+                stored_key = find_idempotency_key(idempotency_key)
+                if stored_key is None:
+                    raise
+
+        if stored_key.request_hash != request_hash:
+            return Response(
+                {'error': f'{IDEMPOTENCY_KEY_HEADER} уже использован для другого заказа'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            stored_key.response_body,
+            status=stored_key.response_status,
+            headers={'Idempotent-Replayed': 'true'},
+        )
+
+    def create_order(self, request, idempotency_key=None, request_hash=None):
         order_serializer = OrderCreateSerializer(data=request.data)
         order_serializer.is_valid(raise_exception=True)
-        order = order_serializer.save()
-        serialized_order = OrderReadSerializer(order).data
+        if settings.ORDER_BUFFERED_INGESTION:
+            return self.enqueue_order(order_serializer, idempotency_key, request_hash)
+
+        with transaction.atomic():
+            order = order_serializer.save()
+            serialized_order = OrderReadSerializer(order).data
+            if idempotency_key:
+                delete_expired_idempotency_keys(idempotency_key)
+                OrderIdempotencyKey.objects.create(
+                    key=idempotency_key,
+                    request_hash=request_hash,
+                    order=order,
+                    response_status=status.HTTP_201_CREATED,
+                    response_body=serialized_order,
+                )
+
+        # Заказ уже сохранён: если подбор ресторанов упадёт, клиент всё равно
+        # должен получить 201, иначе повтор запроса создаст дубль
+        try:
+            refresh_order_candidates([order.id])
+        except Exception:
+            logger.exception(
+                'Не удалось подобрать рестораны для заказа %s, '
+                'их пересчитает python manage.py rebuild_order_candidates',
+                order.id,
+            )
         return Response(serialized_order, status=status.HTTP_201_CREATED)
+
+    def enqueue_order(self, order_serializer, idempotency_key=None, request_hash=None):
+        """Кладёт проверенный заказ в журнал, в базу его перенесёт drain_order_journal."""
+        tracking_id = uuid.uuid4().hex
+        response_body = {'tracking_id': tracking_id, 'status': 'queued'}
+        with transaction.atomic():
+            if idempotency_key:
+                delete_expired_idempotency_keys(idempotency_key)
+                OrderIdempotencyKey.objects.create(
+                    key=idempotency_key,
+                    request_hash=request_hash,
+                    response_status=status.HTTP_202_ACCEPTED,
+                    response_body=response_body,
+                )
+            append_order(order_serializer.get_journal_data(), tracking_id)
+        return Response(response_body, status=status.HTTP_202_ACCEPTED)
+
+
+class OrderTrackingView(APIView):
+    def get(self, request, tracking_id):
+        order = Order.objects.filter(tracking_id=tracking_id).first()
+        if order:
+            return Response({
+                'tracking_id': tracking_id,
+                'status': 'created',
+                'order': OrderReadSerializer(order).data,
+            })
+        if is_pending(tracking_id):
+            return Response({'tracking_id': tracking_id, 'status': 'queued'})
+        rejected_reason = get_rejected_reason(tracking_id)
+        if rejected_reason:
+            return Response({'tracking_id': tracking_id, 'status': 'rejected', 'reason': rejected_reason})
+        return Response({'error': 'Заказ не найден'}, status=status.HTTP_404_NOT_FOUND)
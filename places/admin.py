@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Place
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ['address', 'coordinates', 'lookup_status', 'failures_count', 'next_lookup_at']
+    list_filter = ['lookup_status']
+    search_fields = ['address']
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order, Restaurant
+from places.models import Place
+from utils.addresses import normalize_address
+
+
+class Command(BaseCommand):
+    help = 'Показывает, как часто адреса заказов находятся в кэше мест с нормализацией и без неё'
+
+    def handle(self, *args, **options):
+        addresses = [
+            *Order.objects.values_list('address', flat=True),
+            *Restaurant.objects.values_list('address', flat=True),
+        ]
+        addresses = [address for address in addresses if address]
+        if not addresses:
+            self.stdout.write('Адресов нет')
+            return
+
+        located_places = Place.objects.filter(coordinates__isnull=False)
+        exact_keys = set(located_places.values_list('address', flat=True))
+        normalized_keys = set(located_places.values_list('normalized_address', flat=True))
+
+        exact_hits = sum(address in exact_keys for address in addresses)
+        normalized_hits = sum(normalize_address(address) in normalized_keys for address in addresses)
+        self.stdout.write(f'Адресов в заказах и ресторанах: {len(addresses)}')
+        self.stdout.write(
+            f'Попаданий по точному адресу: {exact_hits} ({exact_hits / len(addresses):.1%}), '
+            f'запросов к геокодеру нужно: {len(set(addresses))}'
+        )
+        self.stdout.write(
+            f'Попаданий по нормализованному адресу: {normalized_hits} ({normalized_hits / len(addresses):.1%}), '
+            f'запросов к геокодеру нужно: {len({normalize_address(address) for address in addresses})}'
+        )
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.geocoder_client import GeocoderUnavailable, get_geocoder_client
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность настроенного геокодера на синтетических адресах. '
+        'В базу ничего не пишет'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--addresses', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=settings.GEOCODER_MAX_WORKERS)
+        parser.add_argument(
+            '--deadline',
+            type=float,
+            default=settings.GEOCODER_DEADLINE,
+            help='Сколько секунд страница ждала бы геокодер',
+        )
+
+    def handle(self, *args, **options):
+        geocoder = get_geocoder_client()
+        addresses = [f'Москва, улица Тестовая, {number}' for number in range(options['addresses'])]
+
+        def geocode(address):
+            started_at = time.perf_counter()
+            try:
+                found = geocoder.geocode(address) is not None
+            except GeocoderUnavailable:
+                found = None
+            return found, time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(geocode, address) for address in addresses]
+            done_in_deadline, _ = wait(futures, timeout=options['deadline'])
+            wait(futures)
+        elapsed = time.perf_counter() - started_at
+
+        results = [future.result() for future in futures]
+        latencies = sorted(latency for _, latency in results)
+        self.stdout.write(f'Геокодер: {type(geocoder).__name__}, потоков: {options["workers"]}')
+        self.stdout.write(
+            f'{len(addresses)} адресов за {elapsed:.2f} с, {len(addresses) / elapsed:.1f} адресов/с'
+        )
+        self.stdout.write(
+            f'Найдено: {sum(found is True for found, _ in results)}, '
+            f'не найдено: {sum(found is False for found, _ in results)}, '
+            f'геокодер недоступен: {sum(found is None for found, _ in results)}'
+        )
+        self.stdout.write(
+            f'Задержка p50: {latencies[len(latencies) // 2]:.3f} с, '
+            f'p95: {latencies[int(len(latencies) * 0.95)]:.3f} с'
+        )
+        self.stdout.write(
+            f'Успели бы за {options["deadline"]} с: {len(done_in_deadline)} из {len(addresses)}, '
+            f'остальные остались бы в очереди'
+        )
+        self.stdout.write(f'Счётчики геокодера: {geocoder.get_stats()}')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.geocoder import get_cache_stats
+from utils.geocoder_client import get_geocoder_client
+from utils.geocoding_queue import process_geocoding_tasks
+from utils.orders import refresh_candidates_for_addresses
+
+
+class Command(BaseCommand):
+    help = 'Геокодирует адреса из очереди и пересчитывает рестораны-кандидаты для заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2,
+            help='Сколько секунд ждать новых задач, если очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать одну пачку задач и выйти',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            geocoded_addresses = process_geocoding_tasks(options['batch_size'])
+            if geocoded_addresses:
+                refresh_candidates_for_addresses(geocoded_addresses)
+                stats = ', '.join(f'{name}={value}' for name, value in get_geocoder_client().get_stats().items())
+                cache_stats = ', '.join(f'{name}={value}' for name, value in get_cache_stats().items())
+                self.stdout.write(
+                    f'Найдены координаты для {len(geocoded_addresses)} адресов. '
+                    f'Геокодер: {stats}. Кэш мест: {cache_stats}'
+                )
+
+            if options['once']:
+                return
+            if not geocoded_addresses:
+                time.sleep(options['sleep'])
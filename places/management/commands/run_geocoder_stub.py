@@ -0,0 +1,79 @@
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from utils.geocoder_client import GazetteerGeocoder
+
+
+MOSCOW_BOUNDS = ((55.55, 55.95), (37.35, 37.85))
+
+
+def get_stub_coordinates(address):
+    digest = hashlib.sha256(address.encode('utf-8')).digest()
+    (min_lat, max_lat), (min_lon, max_lon) = MOSCOW_BOUNDS
+    latitude = min_lat + (max_lat - min_lat) * digest[0] / 255
+    longitude = min_lon + (max_lon - min_lon) * digest[1] / 255
+    return latitude, longitude
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальную заглушку геокодера в формате API Яндекса '
+        'с настраиваемой задержкой и долей ошибок. '
+        'Чтобы сайт ходил в неё, укажите GEOCODER_API_URL=http://127.0.0.1:<порт>/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--latency', type=float, default=0.1, help='Задержка ответа, секунд')
+        parser.add_argument('--jitter', type=float, default=0.05, help='Случайный разброс задержки, секунд')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503, от 0 до 1')
+        parser.add_argument('--not-found-rate', type=float, default=0.0, help='Доля адресов, которые «не найдены»')
+        parser.add_argument('--gazetteer', help='Отвечать координатами из справочника CSV/JSON')
+
+    def handle(self, *args, **options):
+        gazetteer = GazetteerGeocoder(options['gazetteer']) if options['gazetteer'] else None
+
+        class StubHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(max(0, options['latency'] + random.uniform(-options['jitter'], options['jitter'])))
+                if random.random() < options['error_rate']:
+                    self.send_error(503)
+                    return
+
+                address = parse_qs(urlparse(self.path).query).get('geocode', [''])[0]
+                if gazetteer:
+                    coordinates = gazetteer.geocode(address)
+                elif random.random() < options['not_found_rate']:
+                    coordinates = None
+                else:
+                    coordinates = get_stub_coordinates(address)
+
+                feature_members = []
+                if coordinates:
+                    latitude, longitude = coordinates
+                    feature_members.append({'GeoObject': {'Point': {'pos': f'{longitude} {latitude}'}}})
+                body = json.dumps({
+                    'response': {'GeoObjectCollection': {'featureMember': feature_members}}
+                }).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), StubHandler)
+        self.stdout.write(f'Заглушка геокодера слушает http://127.0.0.1:{options["port"]}/')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0050_ordercandidaterestaurant'),
+        ('places', '0002_alter_place_options_alter_place_address_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.FloatField(verbose_name='Расстояние, км')),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='distances', to='places.place', verbose_name='Место')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='place_distances', to='foodcartapp.restaurant', verbose_name='Ресторан')),
+            ],
+            options={
+                'verbose_name': 'Расстояние до ресторана',
+                'verbose_name_plural': 'Расстояния до ресторанов',
+                'unique_together': {('place', 'restaurant')},
+            },
+        ),
+    ]
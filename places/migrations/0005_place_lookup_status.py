@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def fill_lookup_status(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    Place.objects.filter(coordinates__isnull=False).update(lookup_status='found')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0004_geocodingtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='failures_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Неудачных поисков'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='lookup_status',
+            field=models.CharField(choices=[('pending', 'Не искали'), ('found', 'Найден'), ('not_found', 'Не найден')], db_index=True, default='pending', max_length=20, verbose_name='Статус поиска'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='next_lookup_at',
+            field=models.DateTimeField(blank=True, help_text='До этого времени геокодер по адресу не спрашиваем', null=True, verbose_name='Следующий поиск'),
+        ),
+        migrations.RunPython(fill_lookup_status, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+from utils.addresses import normalize_address
+
+
+def fill_normalized_addresses(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    places = list(Place.objects.only('id', 'address'))
+    for place in places:
+        place.normalized_address = normalize_address(place.address)
+    Place.objects.bulk_update(places, ['normalized_address'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0005_place_lookup_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='normalized_address',
+            field=models.CharField(blank=True, db_index=True, help_text='Одинаков для разных написаний одного адреса', max_length=255, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.RunPython(fill_normalized_addresses, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,13 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from utils.addresses import normalize_address
+
+
+MAX_LOOKUP_RETRY_DELAY = timedelta(days=7)
 
 
 class Place(models.Model):
+    LOOKUP_PENDING = 'pending'
+    LOOKUP_FOUND = 'found'
+    LOOKUP_NOT_FOUND = 'not_found'
+
+    LOOKUP_STATUS_CHOICES = [
+        (LOOKUP_PENDING, 'Не искали'),
+        (LOOKUP_FOUND, 'Найден'),
+        (LOOKUP_NOT_FOUND, 'Не найден'),
+    ]
+
     address = models.CharField(
         'Адрес',
         max_length=255,
         unique=True,
         help_text='Адрес места (например, улица и дом)'
     )
+    normalized_address = models.CharField(
+        'Нормализованный адрес',
+        max_length=255,
+        db_index=True,
+        blank=True,
+        help_text='Одинаков для разных написаний одного адреса'
+    )
     coordinates = models.JSONField(
         'Координаты',
         null=True,
@@ -19,11 +45,96 @@ class Place(models.Model):
         auto_now=True,
         help_text='Когда координаты были обновлены'
     )
+    lookup_status = models.CharField(
+        'Статус поиска',
+        max_length=20,
+        choices=LOOKUP_STATUS_CHOICES,
+        default=LOOKUP_PENDING,
+        db_index=True,
+    )
+    failures_count = models.PositiveIntegerField(
+        'Неудачных поисков',
+        default=0,
+    )
+    next_lookup_at = models.DateTimeField(
+        'Следующий поиск',
+        null=True,
+        blank=True,
+        help_text='До этого времени геокодер по адресу не спрашиваем'
+    )
 
     class Meta:
         verbose_name = 'Место'
         verbose_name_plural = 'Места'
         ordering = ['address']
 
+    def can_lookup(self, now=None):
+        return not self.next_lookup_at or self.next_lookup_at <= (now or timezone.now())
+
+    def mark_found(self, coordinates):
+        self.coordinates = list(coordinates)
+        self.lookup_status = self.LOOKUP_FOUND
+        self.failures_count = 0
+        self.next_lookup_at = None
+
+    def mark_not_found(self, now=None):
+        self.lookup_status = self.LOOKUP_NOT_FOUND
+        self.failures_count += 1
+        retry_delay = timedelta(seconds=settings.GEOCODER_NOT_FOUND_RETRY_DELAY * 2 ** (self.failures_count - 1))
+        self.next_lookup_at = (now or timezone.now()) + min(retry_delay, MAX_LOOKUP_RETRY_DELAY)
+
+    def save(self, *args, **kwargs):
+        self.normalized_address = normalize_address(self.address)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.address
+
+
+class PlaceDistance(models.Model):
+    place = models.ForeignKey(
+        Place,
+        related_name='distances',
+        verbose_name='Место',
+        on_delete=models.CASCADE,
+    )
+    restaurant = models.ForeignKey(
+        'foodcartapp.Restaurant',
+        related_name='place_distances',
+        verbose_name='Ресторан',
+        on_delete=models.CASCADE,
+    )
+    distance = models.FloatField('Расстояние, км')
+
+    class Meta:
+        verbose_name = 'Расстояние до ресторана'
+        verbose_name_plural = 'Расстояния до ресторанов'
+        unique_together = [
+            ['place', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f"{self.place} - {self.restaurant}: {self.distance} км"
+
+
+class GeocodingTask(models.Model):
+    address = models.CharField(
+        'Адрес',
+        max_length=255,
+        unique=True,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    run_after = models.DateTimeField(
+        'Запустить после',
+        default=timezone.now,
+        db_index=True,
+    )
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача геокодирования'
+        verbose_name_plural = 'Задачи геокодирования'
+        ordering = ['run_after']
+
     def __str__(self):
         return self.address
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Place, PlaceDistance
+
+
+@receiver(pre_save, sender=Place)
+def remember_place_coordinates(sender, instance, **kwargs):
+    previous_coordinates = (
+        Place.objects
+        .filter(pk=instance.pk)
+        .values_list('coordinates', flat=True)
+        .first()
+    ) if instance.pk else None
+    instance._coordinates_changed = previous_coordinates != instance.coordinates
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def invalidate_cached_coordinates(sender, instance, **kwargs):
+    from utils.geocoder import invalidate_cached_places
+
+    normalized_address = instance.normalized_address
+    invalidate_cached_places([normalized_address])
+    # Пока транзакция не закрыта, другой процесс может снова положить в кэш старое место
+    transaction.on_commit(lambda: invalidate_cached_places([normalized_address]))
+
+
+@receiver(post_save, sender=Place)
+def invalidate_place_distances(sender, instance, created, **kwargs):
+    from utils.orders import refresh_candidates_for_addresses
+
+    if created or not instance._coordinates_changed:
+        return
+    PlaceDistance.objects.filter(
+        Q(place=instance) | Q(restaurant__normalized_address=instance.normalized_address)
+    ).delete()
+    # Кандидаты заказов посчитаны по старым координатам
+    address = instance.address
+    transaction.on_commit(lambda: refresh_candidates_for_addresses([address]))
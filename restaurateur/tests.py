@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from foodcartapp.models import Order, OrderCandidateRestaurant, OrderItem, Product, Restaurant
+
+
+class ViewOrdersQueriesTest(TestCase):
+    """Число запросов страницы заказов не зависит от числа заказов."""
+
+    orders_count = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', password='manager', is_staff=True)
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number)
+            for number in range(3)
+        ]
+        cls.restaurants = [
+            Restaurant.objects.create(
+                name=f'Star Burger {number}',
+                address=f'Москва, Тверская {number}',
+                coordinates=[55.75 + number / 100, 37.6],
+            )
+            for number in range(3)
+        ]
+        cls.cooking_restaurant = cls.restaurants[0]
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def create_orders(self, count):
+        statuses = [
+            Order.STATUS_UNPROCESSED,
+            Order.STATUS_CONFIRMED,
+            Order.STATUS_PREPARING,
+            Order.STATUS_DELIVERING,
+        ]
+        for number in range(count):
+            status = statuses[number % len(statuses)]
+            order = Order.objects.create(
+                firstname='Иван',
+                lastname='Петров',
+                phonenumber='+79991234567',
+                address=f'Москва, Арбат {number}',
+                status=status,
+                cooking_restaurant=self.cooking_restaurant if status == Order.STATUS_PREPARING else None,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=2, price=product.price)
+                for product in self.products
+            ])
+            OrderCandidateRestaurant.objects.bulk_create([
+                OrderCandidateRestaurant(order=order, restaurant=restaurant, distance=restaurant.pk)
+                for restaurant in self.restaurants
+            ])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_grow_with_orders(self):
+        url = reverse('restaurateur:view_orders')
+        self.create_orders(self.orders_count)
+        queries_count = self.count_queries(url)
+
+        self.create_orders(self.orders_count)
+        with self.assertNumQueries(queries_count):
+            response = self.client.get(url)
+        shown_orders = sum(len(section['orders']) for section in response.context['sections'])
+        self.assertEqual(shown_orders, self.orders_count * 2)
+
+    @override_settings(MANAGER_ORDERS_PAGE_SIZE=3)
+    def test_queries_do_not_grow_with_pages(self):
+        url = reverse('restaurateur:view_orders')
+        self.create_orders(self.orders_count)
+        queries_count = self.count_queries(url)
+
+        self.create_orders(self.orders_count)
+        with self.assertNumQueries(queries_count):
+            response = self.client.get(url)
+        active_section = response.context['sections'][1]
+        self.assertEqual(len(active_section['orders']), 3)
+        self.assertIsNotNone(active_section['next_page_query'])
+
+        with self.assertNumQueries(queries_count):
+            response = self.client.get(f'{url}?{active_section["next_page_query"]}')
+        next_active_section = response.context['sections'][1]
+        self.assertEqual(len(next_active_section['orders']), 3)
+        self.assertFalse(
+            {order.id for order in active_section['orders']}
+            & {order.id for order in next_active_section['orders']}
+        )
@@ -7,10 +7,11 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 
-from django.db.models import Prefetch
+from django.conf import settings
+from django.db.models import Prefetch, Q, prefetch_related_objects
 
-from foodcartapp.models import Product, Restaurant, Order, OrderItem, RestaurantMenuItem
-from utils.orders import enrich_orders_with_restaurants
+from foodcartapp.models import Product, Restaurant, Order, OrderCandidateRestaurant
+from utils.orders import enrich_orders_with_restaurants, get_orders_page
 
 
 class Login(forms.Form):
@@ -92,41 +93,65 @@ def view_restaurants(request):
     })
 
 
+# Условия разделов совпадают с условиями частичных индексов
+# order_unprocessed_idx и order_active_idx
+ORDER_SECTIONS = [
+    ('unprocessed', 'Необработанные заказы', Q(status=Order.STATUS_UNPROCESSED)),
+    (
+        'active',
+        'Заказы в работе',
+        Q(status__in=[Order.STATUS_CONFIRMED, Order.STATUS_PREPARING, Order.STATUS_DELIVERING]),
+    ),
+]
+
+
+def get_page_size(params, section_name):
+    try:
+        page_size = int(params.get(f'{section_name}_page_size', settings.MANAGER_ORDERS_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.MANAGER_ORDERS_PAGE_SIZE
+    return min(max(page_size, 1), settings.MANAGER_ORDERS_MAX_PAGE_SIZE)
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    orders = (
-        Order.objects
-        .with_total_price()
-        .prefetch_related(
-            Prefetch(
-                'items',
-                queryset=OrderItem.objects.select_related('product')
-            )
-        )
-        .exclude(status=Order.STATUS_COMPLETED)
-        .order_by('-created_at')
-    )
-
-    unprocessed_orders = orders.filter(status=Order.STATUS_UNPROCESSED)
-    active_orders = orders.exclude(status=Order.STATUS_UNPROCESSED)
+    sections = []
+    for section_name, title, section_filter in ORDER_SECTIONS:
+        section_orders = Order.objects.filter(section_filter).select_related('cooking_restaurant')
+        page_size = get_page_size(request.GET, section_name)
+        cursor_param = f'{section_name}_cursor'
+        try:
+            orders, next_cursor = get_orders_page(section_orders, page_size, request.GET.get(cursor_param))
+        except ValueError:
+            orders, next_cursor = get_orders_page(section_orders, page_size)
+
+        first_page_params = request.GET.copy()
+        first_page_params.pop(cursor_param, None)
+        next_page_params = request.GET.copy()
+        next_page_params[cursor_param] = next_cursor
+        sections.append({
+            'title': title,
+            'orders': orders,
+            'page_size': page_size,
+            'is_first_page': cursor_param not in request.GET,
+            'first_page_query': first_page_params.urlencode(),
+            'next_page_query': next_page_params.urlencode() if next_cursor else None,
+        })
 
-    menu_items = list(
-        RestaurantMenuItem.objects.filter(availability=True)
-        .values('restaurant_id', 'product_id')
+    visible_orders = [order for section in sections for order in section['orders']]
+    prefetch_related_objects(
+        visible_orders,
+        Prefetch(
+            'candidate_restaurants',
+            queryset=OrderCandidateRestaurant.objects.select_related('restaurant')
+        ),
     )
-    restaurants_objects = {r.id: r for r in Restaurant.objects.only('id', 'name', 'coordinates', 'address')}
-    restaurants_for_template = {r.id: r.name for r in restaurants_objects.values()}
-
-    enrich_orders_with_restaurants(unprocessed_orders, menu_items, restaurants_objects)
-    enrich_orders_with_restaurants(active_orders, menu_items, restaurants_objects)
+    enrich_orders_with_restaurants(visible_orders)
 
     return render(
         request,
         template_name='order_items.html',
         context={
-            'unprocessed_orders': unprocessed_orders,
-            'active_orders': active_orders,
-            'menu_items': menu_items,
-            'restaurants': restaurants_for_template
+            'sections': sections,
         }
     )
@@ -12,6 +12,24 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 YANDEX_GEOCODER_API_KEY = env('YANDEX_GEOCODER_API_KEY', None)
+GEOCODER_BACKEND = env('GEOCODER_BACKEND', 'yandex')
+GEOCODER_API_URL = env('GEOCODER_API_URL', None)
+GEOCODER_GAZETTEER_PATH = env('GEOCODER_GAZETTEER_PATH', None)
+GEOCODER_RATE_LIMIT = env.float('GEOCODER_RATE_LIMIT', 10)
+GEOCODER_CIRCUIT_FAILURES = env.int('GEOCODER_CIRCUIT_FAILURES', 5)
+GEOCODER_CIRCUIT_RESET_TIMEOUT = env.float('GEOCODER_CIRCUIT_RESET_TIMEOUT', 30)
+GEOCODER_CACHE_TTL = env.int('GEOCODER_CACHE_TTL', 24 * 60 * 60)
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', 8)
+GEOCODER_DEADLINE = env.float('GEOCODER_DEADLINE', 3.0)
+GEOCODER_NOT_FOUND_RETRY_DELAY = env.int('GEOCODER_NOT_FOUND_RETRY_DELAY', 3600)
+GEOCODING_MAX_ATTEMPTS = env.int('GEOCODING_MAX_ATTEMPTS', 5)
+GEOCODING_RETRY_DELAY = env.int('GEOCODING_RETRY_DELAY', 30)
+DISTANCE_MODE = env('DISTANCE_MODE', 'haversine')
+NEAREST_RESTAURANTS_LIMIT = env.int('NEAREST_RESTAURANTS_LIMIT', 5)
+DISPATCH_CANDIDATES_LIMIT = env.int('DISPATCH_CANDIDATES_LIMIT', 10)
+NEAREST_RESTAURANTS_RADIUS_KM = env.float('NEAREST_RESTAURANTS_RADIUS_KM', None)
+MANAGER_ORDERS_PAGE_SIZE = env.int('MANAGER_ORDERS_PAGE_SIZE', 50)
+MANAGER_ORDERS_MAX_PAGE_SIZE = env.int('MANAGER_ORDERS_MAX_PAGE_SIZE', 500)
 
 SECRET_KEY = env('SECRET_KEY')
 DEBUG = env.bool('DEBUG', True)
@@ -30,6 +48,16 @@ if ROLLBAR_ACCESS_TOKEN and not DEBUG:
     }
     rollbar.init(**ROLLBAR)
 
+FAST_JSON_RENDERER = env.bool('FAST_JSON_RENDERER', False)
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'foodcartapp.renderers.FastJSONRenderer' if FAST_JSON_RENDERER
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 INSTALLED_APPS = [
     'foodcartapp.apps.FoodcartappConfig',
     'restaurateur.apps.RestaurateurConfig',
@@ -97,6 +125,22 @@ WSGI_APPLICATION = 'star_burger.wsgi.application'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'locmem://'),
+}
+
+CATALOG_CACHE_TIMEOUT = env.int('CATALOG_CACHE_TIMEOUT', 24 * 60 * 60)
+CATALOG_CACHE_MAX_AGE = env.int('CATALOG_CACHE_MAX_AGE', 60)
+CATALOG_MAX_PAGE_SIZE = env.int('CATALOG_MAX_PAGE_SIZE', 100)
+
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+ORDER_BUFFERED_INGESTION = env.bool('ORDER_BUFFERED_INGESTION', False)
+ORDER_JOURNAL_PATH = env.str(
+    'ORDER_JOURNAL_PATH',
+    os.path.join(BASE_DIR, 'order_journal', 'orders.sqlite3'),
+)
+
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:////{0}'.format(os.path.join(BASE_DIR, 'db.sqlite3'))
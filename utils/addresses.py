@@ -0,0 +1,49 @@
+import re
+
+
+ADDRESS_TOKEN_PATTERN = re.compile(r'[^\W_]+(?:-[^\W_]+)*')
+NUMBER_PARTS_PATTERN = re.compile(r'\d+|[^\W\d_]+')
+
+CANONICAL_TOKENS = {
+    'ул': 'улица',
+    'д': 'дом',
+    'г': 'город',
+    'гор': 'город',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'с': 'строение',
+    'стр': 'строение',
+    'кв': 'квартира',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'просп': 'проспект',
+    'пр-т': 'проспект',
+    'пр-кт': 'проспект',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'ш': 'шоссе',
+    'наб': 'набережная',
+    'мкр': 'микрорайон',
+    'р-н': 'район',
+}
+
+# Слова, которые пишут по-разному или пропускают: «ул. Арбат» и «Арбат» — один адрес.
+OMITTED_TOKENS = {'улица', 'дом', 'город'}
+
+
+def normalize_address(address):
+    """Ключ адреса, одинаковый для разных написаний одного места.
+
+    «Москва, ул. Новый Арбат, 15» и «москва новый арбат д.15» дают
+    один ключ «москва новый арбат 15».
+    """
+    address = address.casefold().replace('ё', 'е')
+
+    tokens = []
+    for token in ADDRESS_TOKEN_PATTERN.findall(address):
+        parts = [token] if '-' in token else NUMBER_PARTS_PATTERN.findall(token)
+        for part in parts:
+            part = CANONICAL_TOKENS.get(part, part)
+            if part not in OMITTED_TOKENS:
+                tokens.append(part)
+    return ' '.join(tokens)
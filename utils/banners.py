@@ -0,0 +1,58 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from foodcartapp.models import Banner
+from utils.images import build_srcset
+from utils.json_encoding import dumps
+
+
+BANNERS_VERSION_KEY = 'banners:version'
+
+
+def get_banners_version():
+    version = cache.get(BANNERS_VERSION_KEY)
+    if version is None:
+        cache.add(BANNERS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(BANNERS_VERSION_KEY)
+    return version
+
+
+def invalidate_banners():
+    cache.set(BANNERS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def dump_banners(now=None):
+    return [
+        {
+            'title': banner.title,
+            'src': banner.image.url,
+            'srcset': build_srcset(banner.image_variants),
+            'text': banner.text,
+        }
+        for banner in Banner.objects.active(now)
+    ]
+
+
+def get_banners_payload():
+    """Сериализованные баннеры и их ETag.
+
+    Кэш живёт не дольше, чем до ближайшего начала или конца показа
+    какого-нибудь баннера, так что расписание срабатывает без правок.
+    """
+    cache_key = f'banners:payload:{get_banners_version()}:{settings.FAST_JSON_RENDERER:d}'
+    cached_payload = cache.get(cache_key)
+    if cached_payload is None:
+        now = timezone.now()
+        payload = dumps(dump_banners(now))
+        cached_payload = payload, hashlib.sha256(payload).hexdigest()[:32]
+
+        timeout = settings.CATALOG_CACHE_TIMEOUT
+        next_change_at = Banner.objects.next_change_at(now)
+        if next_change_at:
+            timeout = min(timeout, max(1, int((next_change_at - now).total_seconds()) + 1))
+        cache.set(cache_key, cached_payload, timeout=timeout)
+    return cached_payload
@@ -0,0 +1,136 @@
+import base64
+import binascii
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodcartapp.models import Product
+from utils.images import build_srcset
+from utils.json_encoding import dumps
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def invalidate_catalog():
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def encode_cursor(product_id):
+    return base64.urlsafe_b64encode(str(product_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Некорректный cursor')
+
+
+def parse_catalog_query(params):
+    """Разбирает GET-параметры /api/products/.
+
+    category — id категории, special_status — true/false, page_size и
+    cursor включают постраничную выдачу. Бросает ValueError, если
+    параметры некорректны.
+    """
+    query = {}
+
+    if params.get('category'):
+        try:
+            query['category'] = int(params['category'])
+        except ValueError:
+            raise ValueError('category должен быть id категории')
+
+    if params.get('special_status'):
+        special_status = params['special_status'].lower()
+        if special_status not in ('true', 'false', '1', '0'):
+            raise ValueError('special_status должен быть true или false')
+        query['special_status'] = special_status in ('true', '1')
+
+    if params.get('page_size') or params.get('cursor'):
+        try:
+            page_size = int(params.get('page_size') or settings.CATALOG_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValueError('page_size должен быть числом')
+        if not 1 <= page_size <= settings.CATALOG_MAX_PAGE_SIZE:
+            raise ValueError(f'page_size должен быть от 1 до {settings.CATALOG_MAX_PAGE_SIZE}')
+        query['page_size'] = page_size
+        query['after_id'] = decode_cursor(params['cursor']) if params.get('cursor') else 0
+
+    return query
+
+
+def dump_products(category=None, special_status=None, page_size=None, after_id=0):
+    products = Product.objects.select_related('category').available().order_by('id')
+    if category is not None:
+        products = products.filter(category_id=category)
+    if special_status is not None:
+        products = products.filter(special_status=special_status)
+    if page_size:
+        products = products.filter(id__gt=after_id)[:page_size + 1]
+
+    dumped_products = []
+    for product in products:
+        dumped_product = {
+            'id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'special_status': product.special_status,
+            'description': product.description,
+            'category': {
+                'id': product.category.id,
+                'name': product.category.name,
+            } if product.category else None,
+            'image': product.image.url,
+            'image_srcset': build_srcset(product.image_variants),
+            'restaurant': {
+                'id': product.id,
+                'name': product.name,
+            }
+        }
+        dumped_products.append(dumped_product)
+
+    if not page_size:
+        return dumped_products
+
+    next_cursor = None
+    if len(dumped_products) > page_size:
+        dumped_products = dumped_products[:page_size]
+        next_cursor = encode_cursor(dumped_products[-1]['id'])
+    return {
+        'results': dumped_products,
+        'next_cursor': next_cursor,
+    }
+
+
+def build_catalog_payload(query):
+    payload = dumps(dump_products(**query))
+    return payload, hashlib.sha256(payload).hexdigest()[:32]
+
+
+def get_catalog_payload(query=None):
+    """Сериализованный каталог и его ETag.
+
+    Байты хранятся в кэше под ключом с версией каталога и параметрами
+    выборки, а версия меняется сигналами при любой правке товаров,
+    категорий и меню.
+    """
+    query = query or {}
+    query_key = ':'.join(f'{name}={value}' for name, value in sorted(query.items()))
+    cache_key = f'catalog:payload:{get_catalog_version()}:{settings.FAST_JSON_RENDERER:d}:{query_key}'
+    cached_payload = cache.get(cache_key)
+    if cached_payload is None:
+        cached_payload = build_catalog_payload(query)
+        cache.set(cache_key, cached_payload, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return cached_payload
@@ -0,0 +1,239 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from foodcartapp.models import Order, Restaurant
+from utils.orders import get_all_order_candidates
+
+
+UNKNOWN_DISTANCE_COST = 10_000
+
+
+class MinCostFlow:
+    def __init__(self, nodes_count):
+        self.graph = [[] for _ in range(nodes_count)]
+        self.edges = []
+        self.potentials = [0] * nodes_count
+
+    def add_edge(self, source, target, capacity, cost):
+        self.graph[source].append(len(self.edges))
+        self.edges.append([target, capacity, cost])
+        self.graph[target].append(len(self.edges))
+        self.edges.append([source, 0, -cost])
+        return len(self.edges) - 2
+
+    def _find_cheapest_path(self, source, sink):
+        """Дейкстра по приведённым стоимостям с потенциалами Джонсона.
+
+        Стоимости рёбер до первого запуска неотрицательны, а потенциалы
+        после каждого поиска сохраняют неотрицательность приведённых
+        стоимостей и у обратных рёбер остаточной сети. Поиск
+        останавливается, как только дошёл до стока.
+        """
+        potentials = self.potentials
+        distances = [None] * len(self.graph)
+        previous_edges = [None] * len(self.graph)
+        distances[source] = 0
+        heap = [(0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            if node == sink:
+                break
+            node_potential = potentials[node]
+            for edge_index in self.graph[node]:
+                target, capacity, cost = self.edges[edge_index]
+                if not capacity:
+                    continue
+                target_distance = distance + cost + node_potential - potentials[target]
+                if distances[target] is None or target_distance < distances[target]:
+                    distances[target] = target_distance
+                    previous_edges[target] = edge_index
+                    heapq.heappush(heap, (target_distance, target))
+        sink_distance = distances[sink]
+        if sink_distance is None:
+            return None
+        for node, distance in enumerate(distances):
+            potentials[node] += sink_distance if distance is None else min(distance, sink_distance)
+        return previous_edges
+
+    def solve(self, source, sink):
+        """Пускает поток по одной единице вдоль самых дешёвых путей."""
+        while True:
+            previous_edges = self._find_cheapest_path(source, sink)
+            if previous_edges is None:
+                return
+            node = sink
+            while node != source:
+                edge_index = previous_edges[node]
+                self.edges[edge_index][1] -= 1
+                self.edges[edge_index ^ 1][1] += 1
+                node = self.edges[edge_index ^ 1][0]
+
+
+def solve_assignment(order_candidates, capacities):
+    """Самое дешёвое из распределений с наибольшим числом назначенных заказов."""
+    order_ids = list(order_candidates)
+    restaurant_ids = sorted({
+        restaurant_id
+        for candidates in order_candidates.values()
+        for restaurant_id, _ in candidates
+    })
+    order_nodes = {order_id: 2 + index for index, order_id in enumerate(order_ids)}
+    restaurant_nodes = {
+        restaurant_id: 2 + len(order_ids) + index
+        for index, restaurant_id in enumerate(restaurant_ids)
+    }
+    source, sink = 0, 1
+
+    flow = MinCostFlow(2 + len(order_ids) + len(restaurant_ids))
+    candidate_edges = {}
+    for order_id, candidates in order_candidates.items():
+        flow.add_edge(source, order_nodes[order_id], 1, 0)
+        for restaurant_id, distance in candidates:
+            cost = round(distance * 1000) if distance is not None else UNKNOWN_DISTANCE_COST * 1000
+            edge_index = flow.add_edge(order_nodes[order_id], restaurant_nodes[restaurant_id], 1, cost)
+            candidate_edges[edge_index] = (order_id, restaurant_id)
+    for restaurant_id, node in restaurant_nodes.items():
+        capacity = capacities.get(restaurant_id)
+        flow.add_edge(node, sink, len(order_ids) if capacity is None else capacity, 0)
+
+    flow.solve(source, sink)
+    return {
+        order_id: restaurant_id
+        for edge_index, (order_id, restaurant_id) in candidate_edges.items()
+        if not flow.edges[edge_index][1]
+    }
+
+
+def find_blocking_orders(order_candidates, capacities, assignments):
+    """Заказы, через которые можно назначить ещё хотя бы один заказ.
+
+    Ищет в полном графе кандидатов цепочку от неназначенного заказа через
+    занятые рестораны и их заказы до ресторана со свободным местом.
+    Возвращает заказы, пройденные поиском, или пустое множество, если
+    такой цепочки нет и больше заказов назначить нельзя.
+    """
+    assigned_orders = {}
+    for order_id, restaurant_id in assignments.items():
+        assigned_orders.setdefault(restaurant_id, []).append(order_id)
+
+    queue = [order_id for order_id in order_candidates if order_id not in assignments]
+    reached_orders = set(queue)
+    reached_restaurants = set()
+    while queue:
+        order_id = queue.pop()
+        for restaurant_id, _ in order_candidates[order_id]:
+            if restaurant_id in reached_restaurants or assignments.get(order_id) == restaurant_id:
+                continue
+            reached_restaurants.add(restaurant_id)
+            capacity = capacities.get(restaurant_id)
+            if capacity is None or len(assigned_orders.get(restaurant_id, [])) < capacity:
+                return reached_orders
+            for assigned_order_id in assigned_orders.get(restaurant_id, []):
+                if assigned_order_id not in reached_orders:
+                    reached_orders.add(assigned_order_id)
+                    queue.append(assigned_order_id)
+    return set()
+
+
+def assign_orders(order_candidates, capacities, candidates_limit=None):
+    """Распределяет заказы по ресторанам с минимальным суммарным расстоянием.
+
+    order_candidates — {id заказа: [(id ресторана, км или None), ...]},
+    capacities — {id ресторана: сколько заказов ещё можно взять или None}.
+    Назначается как можно больше заказов, и среди таких распределений
+    выбирается самое дешёвое.
+
+    Чтобы граф оставался разреженным, у заказа сначала берутся только
+    candidates_limit ближайших ресторанов со свободными местами. Список
+    удваивается только у заказов, через которые можно назначить ещё
+    один заказ, так что число назначенных заказов всегда наибольшее,
+    а расстояние может быть чуть больше точного минимума.
+    """
+    candidates_limit = candidates_limit or settings.DISPATCH_CANDIDATES_LIMIT
+    order_candidates = {
+        order_id: sorted(
+            (
+                (restaurant_id, distance)
+                for restaurant_id, distance in candidates
+                if capacities.get(restaurant_id) != 0
+            ),
+            key=lambda candidate: (candidate[1] is None, candidate[1] or 0),
+        )
+        for order_id, candidates in order_candidates.items()
+    }
+    limits = dict.fromkeys(order_candidates, candidates_limit)
+    while True:
+        assignments = solve_assignment(
+            {order_id: candidates[:limits[order_id]] for order_id, candidates in order_candidates.items()},
+            capacities,
+        )
+        widened_order_ids = [
+            order_id
+            for order_id in find_blocking_orders(order_candidates, capacities, assignments)
+            if limits[order_id] < len(order_candidates[order_id])
+        ]
+        if not widened_order_ids:
+            return assignments
+        for order_id in widened_order_ids:
+            limits[order_id] *= 2
+
+
+def get_free_capacities():
+    restaurants = Restaurant.objects.annotate(
+        active_orders_count=Count(
+            'orders',
+            filter=~Q(orders__status__in=[Order.STATUS_UNPROCESSED, Order.STATUS_COMPLETED]),
+        )
+    )
+    return {
+        restaurant.id: (
+            None if restaurant.order_capacity is None
+            else max(restaurant.order_capacity - restaurant.active_orders_count, 0)
+        )
+        for restaurant in restaurants
+    }
+
+
+def dispatch_orders(orders=None, dry_run=False):
+    """Назначает необработанным заказам готовящие рестораны одним пакетом.
+
+    Кандидаты — все рестораны, способные приготовить заказ, а не только
+    NEAREST_RESTAURANTS_LIMIT ближайших. С dry_run=True ничего не пишет
+    в базу. Возвращает список назначений (заказ, ресторан, расстояние в км).
+    """
+    if orders is None:
+        orders = Order.objects.all()
+
+    with transaction.atomic():
+        orders = list(
+            orders
+            .select_for_update()
+            .filter(status=Order.STATUS_UNPROCESSED, cooking_restaurant__isnull=True)
+        )
+        if not orders:
+            return []
+        order_candidates = get_all_order_candidates(orders, persist=not dry_run)
+
+        assignments = assign_orders(order_candidates, get_free_capacities())
+        distances = {
+            (order_id, restaurant_id): distance
+            for order_id, candidates in order_candidates.items()
+            for restaurant_id, distance in candidates
+        }
+
+        dispatched_orders = [order for order in orders if order.id in assignments]
+        for order in dispatched_orders:
+            order.cooking_restaurant_id = assignments[order.id]
+            order.status = Order.STATUS_PREPARING
+        if not dry_run:
+            Order.objects.bulk_update(dispatched_orders, ['cooking_restaurant', 'status'])
+
+    return [
+        (order, order.cooking_restaurant_id, distances[order.id, order.cooking_restaurant_id])
+        for order in dispatched_orders
+    ]
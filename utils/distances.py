@@ -0,0 +1,71 @@
+import math
+
+from django.conf import settings
+from geopy.distance import geodesic
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+DISTANCE_MODES = ('geodesic', 'haversine', 'equirectangular')
+
+
+def parse_coordinates(coordinates):
+    if not coordinates:
+        return None
+    try:
+        latitude, longitude = map(float, coordinates)
+    except (TypeError, ValueError):
+        return None
+    return latitude, longitude
+
+
+def _to_radians(points):
+    radians = []
+    for latitude, longitude in points:
+        latitude, longitude = math.radians(latitude), math.radians(longitude)
+        radians.append((latitude, longitude, math.cos(latitude)))
+    return radians
+
+
+def _haversine_row(origin, destinations):
+    origin_lat, origin_lon, origin_cos = origin
+    row = []
+    for lat, lon, cos_lat in destinations:
+        a = (
+            math.sin((lat - origin_lat) / 2) ** 2
+            + origin_cos * cos_lat * math.sin((lon - origin_lon) / 2) ** 2
+        )
+        row.append(2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))))
+    return row
+
+
+def _equirectangular_row(origin, destinations):
+    origin_lat, origin_lon, _ = origin
+    row = []
+    for lat, lon, _ in destinations:
+        x = (lon - origin_lon) * math.cos((lat + origin_lat) / 2)
+        y = lat - origin_lat
+        row.append(EARTH_RADIUS_KM * math.hypot(x, y))
+    return row
+
+
+def get_distance_matrix(origins, destinations, mode=None):
+    """Расстояния в км от каждой точки origins до каждой точки destinations.
+
+    Точки — пары (широта, долгота). Режим `geodesic` точный, но медленный,
+    `haversine` ошибается не больше чем на 0,5%, `equirectangular` годится
+    только для расстояний в пределах города.
+    """
+    mode = mode or settings.DISTANCE_MODE
+    if mode not in DISTANCE_MODES:
+        raise ValueError(f'Неизвестный режим расчёта расстояний: {mode}')
+
+    if mode == 'geodesic':
+        return [
+            [geodesic(origin, destination).kilometers for destination in destinations]
+            for origin in origins
+        ]
+
+    calculate_row = _haversine_row if mode == 'haversine' else _equirectangular_row
+    destinations = _to_radians(destinations)
+    return [calculate_row(origin, destinations) for origin in _to_radians(origins)]
@@ -1,41 +1,161 @@
-import time
-import requests
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 from places.models import Place
+from utils.addresses import normalize_address
+from utils.geocoder_client import GeocoderUnavailable, get_geocoder_client
+
+
+PENDING = 'pending'
+
+
+PLACE_CACHE_KEY = 'geocoder:place:{}'
+
+
+class PlaceCacheStats:
+    """Счётчики попаданий в кэш мест внутри процесса."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def add(self, hits, misses):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_stats(self):
+        with self.lock:
+            requests_count = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / requests_count, 3) if requests_count else None,
+            }
+
+
+place_cache_stats = PlaceCacheStats()
+
+
+def get_cache_stats():
+    return place_cache_stats.get_stats()
 
 
-YANDEX_API_URL = "https://geocode-maps.yandex.ru/1.x/"
+def get_place_cache_key(normalized_address):
+    # Адрес может содержать пробелы и кириллицу, которые не любит memcached
+    return PLACE_CACHE_KEY.format(hashlib.sha1(normalized_address.encode()).hexdigest())
 
 
-def get_coordinates(address: str, retries: int = 3, delay: float = 0.5):
-    if not address:
-        return None
+def invalidate_cached_places(normalized_addresses):
+    cache.delete_many([get_place_cache_key(key) for key in normalized_addresses])
 
-    place, created = Place.objects.get_or_create(address=address)
-    if place.coordinates:
-        return tuple(place.coordinates)
 
-    params = {
-        "apikey": settings.YANDEX_GEOCODER_API_KEY,
-        "geocode": address,
-        "format": "json",
+def fetch_coordinates(address: str):
+    return get_geocoder_client().geocode(address)
+
+
+def get_places(addresses):
+    """Находит сохранённые места для адресов по нормализованному ключу.
+
+    Возвращает {адрес: Place или None}. Если под ключ подходит несколько
+    мест, предпочитается место с координатами. Места с координатами
+    берутся из общего кэша Django, так что его сброс при сохранении
+    места виден всем процессам.
+    """
+    address_keys = {address: normalize_address(address) for address in addresses}
+    keys = set(address_keys.values())
+    cache_keys = {get_place_cache_key(key): key for key in keys}
+    places_by_key = {
+        cache_keys[cache_key]: place
+        for cache_key, place in cache.get_many(cache_keys).items()
+    }
+    missing_keys = keys - places_by_key.keys()
+    place_cache_stats.add(len(places_by_key), len(missing_keys))
+
+    found_places = {}
+    for place in Place.objects.filter(normalized_address__in=missing_keys) if missing_keys else []:
+        known_place = found_places.get(place.normalized_address)
+        if not known_place or place.coordinates and not known_place.coordinates:
+            found_places[place.normalized_address] = place
+    cache.set_many(
+        {get_place_cache_key(key): place for key, place in found_places.items() if place.coordinates},
+        timeout=settings.GEOCODER_CACHE_TTL,
+    )
+    places_by_key.update(found_places)
+    return {address: places_by_key.get(key) for address, key in address_keys.items()}
+
+
+def get_coordinates_many(addresses, max_workers=None, deadline=None):
+    """Геокодирует адреса пачкой, не дольше deadline секунд.
+
+    Возвращает словарь {адрес: координаты}. Для ненайденных адресов
+    значение None, а для тех, что не успели геокодировать или на которых
+    геокодер не ответил, — PENDING. Адреса, которые геокодер недавно не
+    нашёл, повторно не запрашиваются до Place.next_lookup_at. Разные
+    написания одного адреса геокодируются один раз.
+    """
+    addresses = {address for address in addresses if address}
+    if not addresses:
+        return {}
+
+    coordinates = {}
+    now = timezone.now()
+    places = get_places(addresses)
+    for address, place in places.items():
+        if place and place.coordinates:
+            coordinates[address] = tuple(place.coordinates)
+        elif place and not place.can_lookup(now):
+            coordinates[address] = None
+
+    addresses_by_key = {}
+    for address in addresses - coordinates.keys():
+        addresses_by_key.setdefault(normalize_address(address), []).append(address)
+    if not addresses_by_key:
+        return coordinates
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or settings.GEOCODER_MAX_WORKERS)
+    futures = {
+        executor.submit(fetch_coordinates, key_addresses[0]): key_addresses
+        for key_addresses in addresses_by_key.values()
     }
-    for attempt in range(retries):
+    done, not_done = wait(futures, timeout=deadline or settings.GEOCODER_DEADLINE)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    places_to_create = []
+    places_to_update = []
+    for future in not_done:
+        coordinates.update(dict.fromkeys(futures[future], PENDING))
+    for future in done:
+        key_addresses = futures[future]
         try:
-            response = requests.get(YANDEX_API_URL, params=params, timeout=5)
-            response.raise_for_status()
-            response_json = response.json()
-
-            point = response_json["response"]["GeoObjectCollection"]["featureMember"][0]["GeoObject"]["Point"]["pos"]
-            longitude, latitude = map(float, point.split())
-            coordinates = [latitude, longitude]
-
-            place.coordinates = coordinates
-            place.save(update_fields=['coordinates'])
-            return tuple(coordinates)
-
-        except (IndexError, KeyError):
-            return None
-        except requests.exceptions.RequestException:
-            time.sleep(delay)
-    return None
+            found_coordinates = future.result()
+        except GeocoderUnavailable:
+            coordinates.update(dict.fromkeys(key_addresses, PENDING))
+            continue
+        coordinates.update(dict.fromkeys(key_addresses, found_coordinates))
+
+        address = key_addresses[0]
+        place = places[address] or Place(address=address, normalized_address=normalize_address(address))
+        if found_coordinates:
+            place.mark_found(found_coordinates)
+        else:
+            place.mark_not_found(now)
+        place.updated_at = now
+        if place.pk:
+            places_to_update.append(place)
+        else:
+            places_to_create.append(place)
+
+    Place.objects.bulk_create(places_to_create, ignore_conflicts=True)
+    Place.objects.bulk_update(
+        places_to_update,
+        ['coordinates', 'lookup_status', 'failures_count', 'next_lookup_at', 'updated_at'],
+    )
+    # bulk_update не шлёт post_save, поэтому кэш сбрасываем сами
+    invalidate_cached_places({place.normalized_address for place in places_to_update})
+    return coordinates
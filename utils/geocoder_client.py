@@ -0,0 +1,228 @@
+import abc
+import csv
+import json
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from utils.addresses import normalize_address
+
+
+YANDEX_API_URL = "https://geocode-maps.yandex.ru/1.x/"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class GeocoderUnavailable(Exception):
+    pass
+
+
+class TokenBucket:
+    """Пропускает не больше rate запросов в секунду, допуская всплески до capacity."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class CircuitBreaker:
+    """Перестаёт пускать запросы после failure_threshold ошибок подряд.
+
+    Через reset_timeout секунд пропускает один пробный запрос: если он
+    успешен, цепь снова замыкается.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures_count = 0
+        self.opened_at = None
+        self.trial_started = False
+        self.open_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_started or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial_started = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                self.open_seconds += time.monotonic() - self.opened_at
+            self.failures_count = 0
+            self.opened_at = None
+            self.trial_started = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures_count += 1
+            if self.opened_at is not None:
+                self.trial_started = False
+                self.open_seconds += time.monotonic() - self.opened_at
+                self.opened_at = time.monotonic()
+            elif self.failures_count >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def get_open_seconds(self):
+        with self.lock:
+            if self.opened_at is None:
+                return self.open_seconds
+            return self.open_seconds + time.monotonic() - self.opened_at
+
+
+class GeocoderBackend(abc.ABC):
+    """Источник координат для get_coordinates_many.
+
+    geocode возвращает пару (широта, долгота) или None, если адрес не
+    найден, а если источник не отвечает — бросает GeocoderUnavailable.
+    """
+
+    def __init__(self):
+        self.stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    def _count(self, counter):
+        with self.stats_lock:
+            self.stats[counter] += 1
+
+    def get_stats(self):
+        with self.stats_lock:
+            return dict(self.stats)
+
+    @abc.abstractmethod
+    def geocode(self, address):
+        ...
+
+
+class GazetteerGeocoder(GeocoderBackend):
+    """Ищет адреса в локальном справочнике без обращения к сети.
+
+    Справочник — CSV с колонками address, lat, lon или JSON-словарь
+    {адрес: [широта, долгота]}.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.coordinates = {}
+        with open(path, encoding='utf-8') as gazetteer_file:
+            if os.path.splitext(path)[1].lower() == '.json':
+                rows = json.load(gazetteer_file).items()
+            else:
+                rows = ((row['address'], (row['lat'], row['lon'])) for row in csv.DictReader(gazetteer_file))
+            for address, (latitude, longitude) in rows:
+                self.coordinates[normalize_address(address)] = (float(latitude), float(longitude))
+
+    def geocode(self, address):
+        self._count('calls')
+        return self.coordinates.get(normalize_address(address))
+
+
+class YandexGeocoder(GeocoderBackend):
+    def __init__(self, api_url, api_key, rate_limit, failure_threshold, reset_timeout,
+                 pool_size=10, timeout=5, retries=3, retry_delay=0.5):
+        super().__init__()
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['open_circuit_seconds'] = round(self.circuit_breaker.get_open_seconds(), 1)
+        return stats
+
+    def geocode(self, address):
+        params = {
+            "apikey": self.api_key,
+            "geocode": address,
+            "format": "json",
+        }
+        last_error = None
+        for attempt in range(self.retries):
+            if not self.circuit_breaker.allow_request():
+                self._count('rejected')
+                raise GeocoderUnavailable(f'Геокодер недоступен, запрос «{address}» не отправлен')
+            if attempt:
+                self._count('retries')
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+            self.rate_limiter.acquire()
+            self._count('calls')
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                response_json = response.json()
+            except requests.exceptions.RequestException as error:
+                last_error = error
+                self._count('failures')
+                self.circuit_breaker.record_failure()
+                continue
+
+            self.circuit_breaker.record_success()
+            try:
+                point = response_json["response"]["GeoObjectCollection"]["featureMember"][0]["GeoObject"]["Point"]["pos"]
+            except (IndexError, KeyError):
+                return None
+            longitude, latitude = map(float, point.split())
+            return latitude, longitude
+
+        # Текст ошибки requests содержит URL с API-ключом, поэтому в сообщение попадает только её тип
+        raise GeocoderUnavailable(f'Геокодер не ответил на запрос «{address}»: {type(last_error).__name__}')
+
+
+def get_geocoder_client():
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = create_geocoder_backend()
+    return _client
+
+
+def create_geocoder_backend():
+    if settings.GEOCODER_BACKEND == 'gazetteer':
+        return GazetteerGeocoder(settings.GEOCODER_GAZETTEER_PATH)
+    if settings.GEOCODER_BACKEND == 'yandex':
+        return YandexGeocoder(
+            settings.GEOCODER_API_URL or YANDEX_API_URL,
+            settings.YANDEX_GEOCODER_API_KEY,
+            rate_limit=settings.GEOCODER_RATE_LIMIT,
+            failure_threshold=settings.GEOCODER_CIRCUIT_FAILURES,
+            reset_timeout=settings.GEOCODER_CIRCUIT_RESET_TIMEOUT,
+            pool_size=settings.GEOCODER_MAX_WORKERS,
+        )
+    raise ValueError(f'Неизвестный геокодер: {settings.GEOCODER_BACKEND}')
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from places.models import GeocodingTask
+from utils.geocoder import PENDING, get_coordinates_many, get_places
+
+
+def enqueue_geocoding(addresses):
+    GeocodingTask.objects.bulk_create(
+        [GeocodingTask(address=address) for address in set(addresses) if address],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_unknown_addresses(addresses):
+    """Ставит в очередь только адреса без координат, которые пора искать.
+
+    Адреса с уже найденными координатами и адреса, которые геокодер
+    недавно не нашёл, пропускаются.
+    """
+    now = timezone.now()
+    enqueue_geocoding(
+        address
+        for address, place in get_places(set(addresses)).items()
+        if not place or not place.coordinates and place.can_lookup(now)
+    )
+
+
+def claim_geocoding_tasks(batch_size):
+    """Берёт в работу готовые к запуску задачи.
+
+    Взятые задачи откладываются на GEOCODER_DEADLINE с запасом, чтобы
+    параллельный воркер не взял их повторно.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            GeocodingTask.objects
+            .select_for_update(skip_locked=True)
+            .filter(run_after__lte=now)[:batch_size]
+        )
+        GeocodingTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            run_after=now + timedelta(seconds=settings.GEOCODER_DEADLINE * 2),
+        )
+    return tasks
+
+
+def process_geocoding_tasks(batch_size=50):
+    """Геокодирует пачку задач и возвращает адреса, у которых появились координаты."""
+    tasks = claim_geocoding_tasks(batch_size)
+    if not tasks:
+        return []
+
+    coordinates = get_coordinates_many(task.address for task in tasks)
+
+    finished_tasks = []
+    retried_tasks = []
+    now = timezone.now()
+    for task in tasks:
+        if coordinates.get(task.address) != PENDING:
+            finished_tasks.append(task)
+            continue
+        task.attempts += 1
+        if task.attempts >= settings.GEOCODING_MAX_ATTEMPTS:
+            finished_tasks.append(task)
+            continue
+        task.run_after = now + timedelta(seconds=settings.GEOCODING_RETRY_DELAY * 2 ** (task.attempts - 1))
+        retried_tasks.append(task)
+
+    GeocodingTask.objects.filter(pk__in=[task.pk for task in finished_tasks]).delete()
+    GeocodingTask.objects.bulk_update(retried_tasks, ['attempts', 'run_after'])
+
+    return [task.address for task in tasks if coordinates.get(task.address) not in (None, PENDING)]
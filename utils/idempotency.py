@@ -0,0 +1,37 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from foodcartapp.models import OrderIdempotencyKey
+
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+
+
+def get_request_hash(data):
+    canonical_data = json.dumps(data, sort_keys=True, ensure_ascii=False, cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical_data.encode()).hexdigest()
+
+
+def get_expiration_threshold():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def find_idempotency_key(key):
+    return (
+        OrderIdempotencyKey.objects
+        .filter(key=key, created_at__gte=get_expiration_threshold())
+        .first()
+    )
+
+
+def delete_expired_idempotency_keys(key=None):
+    expired_keys = OrderIdempotencyKey.objects.filter(created_at__lt=get_expiration_threshold())
+    if key is not None:
+        expired_keys = expired_keys.filter(key=key)
+    deleted_count, _ = expired_keys.delete()
+    return deleted_count
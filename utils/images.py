@@ -0,0 +1,106 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+# Ширина вариантов картинки в пикселях: превью в списках, карточка
+# на витрине и карточка для экранов с двойной плотностью пикселей
+IMAGE_VARIANTS = {
+    'thumbnail': 100,
+    'card': 400,
+    'retina': 800,
+}
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', {'optimize': True}),
+}
+
+
+def has_transparency(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def encode_image(image, image_format):
+    pil_format, options = VARIANT_FORMATS[image_format]
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def save_variant(content, upload_to, stem, variant, image_format, storage):
+    content_hash = hashlib.sha256(content).hexdigest()[:12]
+    name = f'{upload_to}/{stem}-{variant}.{content_hash}.{image_format}'
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_image_variants(image_file, upload_to='variants', storage=None):
+    """Режет картинку на варианты из IMAGE_VARIANTS в WebP и JPEG (PNG для прозрачных).
+
+    Имена файлов содержат хэш содержимого, поэтому их можно кэшировать
+    навсегда. Картинки не растягиваются: вариант шире оригинала получает
+    ширину оригинала. Возвращает словарь для JSONField вида
+    {'thumbnail': {'width': 100, 'webp': 'путь', 'jpeg': 'путь'}, ...}.
+    """
+    storage = storage or default_storage
+    stem = os.path.splitext(os.path.basename(image_file.name))[0]
+
+    image_file.open('rb')
+    try:
+        with Image.open(image_file) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+    finally:
+        image_file.close()
+    fallback_format = 'png' if has_transparency(source) else 'jpeg'
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA' if fallback_format == 'png' else 'RGB')
+
+    variants = {}
+    variants_by_width = {}
+    for variant, width in IMAGE_VARIANTS.items():
+        width = min(width, source.width)
+        if width in variants_by_width:
+            variants[variant] = variants_by_width[width]
+            continue
+        height = max(1, round(source.height * width / source.width))
+        resized = source.resize((width, height), Image.LANCZOS) if width != source.width else source
+
+        variants[variant] = variants_by_width[width] = {'width': width}
+        for image_format in ('webp', fallback_format):
+            content = encode_image(resized, image_format)
+            variants[variant][image_format] = save_variant(
+                content, upload_to, stem, variant, image_format, storage
+            )
+    return variants
+
+
+def get_variant_url(variants, variant, image_format=None, storage=None):
+    storage = storage or default_storage
+    formats = variants.get(variant) or {}
+    name = formats.get(image_format) if image_format else formats.get('jpeg') or formats.get('png')
+    return storage.url(name) if name else None
+
+
+def build_srcset(variants, storage=None):
+    """srcset для каждого формата: {'webp': 'url 100w, url 400w', 'jpeg': ...}."""
+    storage = storage or default_storage
+    srcset = {}
+    for image_format in VARIANT_FORMATS:
+        candidates = {}
+        for formats in variants.values():
+            if image_format in formats:
+                candidates[formats['width']] = storage.url(formats[image_format])
+        if candidates:
+            srcset[image_format] = ', '.join(
+                f'{url} {width}w' for width, url in sorted(candidates.items())
+            )
+    return srcset
@@ -0,0 +1,32 @@
+import json
+from decimal import Decimal
+
+import orjson
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.functional import Promise
+from phonenumber_field.phonenumber import PhoneNumber
+
+
+def _encode_default(value):
+    # Decimal отдаём строкой, как DjangoJSONEncoder, чтобы не терять копейки
+    if isinstance(value, (Decimal, Promise)):
+        return str(value)
+    if isinstance(value, PhoneNumber):
+        return value.as_e164
+    raise TypeError(f'Объект типа {type(value).__name__} не сериализуется в JSON')
+
+
+def fast_dumps(data):
+    return orjson.dumps(data, default=_encode_default)
+
+
+def dumps(data):
+    """Сериализует данные API в байты JSON.
+
+    С FAST_JSON_RENDERER — компактно через orjson, иначе как раньше:
+    стандартный json с отступами.
+    """
+    if settings.FAST_JSON_RENDERER:
+        return fast_dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4).encode('utf-8')
@@ -0,0 +1,44 @@
+class RestaurantMenuIndex:
+    """Битовые маски «продукт → рестораны, где он в продаже».
+
+    Каждому ресторану выдаётся свой бит, поэтому рестораны, способные
+    приготовить весь заказ, находятся побитовым AND масок его продуктов.
+    """
+
+    def __init__(self, menu_items):
+        self.restaurant_ids = []
+        self.product_masks = {}
+
+        restaurant_bits = {}
+        for menu_item in menu_items:
+            restaurant_id = menu_item['restaurant_id']
+            product_id = menu_item['product_id']
+
+            bit = restaurant_bits.get(restaurant_id)
+            if bit is None:
+                bit = 1 << len(self.restaurant_ids)
+                restaurant_bits[restaurant_id] = bit
+                self.restaurant_ids.append(restaurant_id)
+
+            self.product_masks[product_id] = self.product_masks.get(product_id, 0) | bit
+
+    def get_restaurants_mask(self, product_ids):
+        if not product_ids:
+            return 0
+
+        mask = -1
+        for product_id in product_ids:
+            mask &= self.product_masks.get(product_id, 0)
+            if not mask:
+                return 0
+        return mask
+
+    def get_restaurant_ids(self, product_ids):
+        mask = self.get_restaurants_mask(product_ids)
+
+        restaurant_ids = []
+        while mask:
+            lowest_bit = mask & -mask
+            restaurant_ids.append(self.restaurant_ids[lowest_bit.bit_length() - 1])
+            mask ^= lowest_bit
+        return restaurant_ids
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from foodcartapp.models import Order, OrderItem, Product
+from utils.addresses import normalize_address
+from utils.geocoding_queue import enqueue_unknown_addresses
+from utils.orders import refresh_order_candidates
+
+
+JOURNAL_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS order_journal (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tracking_id TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        drained_at REAL,
+        rejected_reason TEXT
+    );
+    CREATE INDEX IF NOT EXISTS order_journal_pending ON order_journal (drained_at, id);
+'''
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def get_journal_connection():
+    """Соединение с журналом заказов, своё у каждого потока.
+
+    Журнал — SQLite-файл в режиме WAL с synchronous=FULL: запись
+    подтверждается клиенту только после fsync, так что принятый заказ
+    переживает падение процесса и сервера.
+    """
+    path = settings.ORDER_JOURNAL_PATH
+    if not hasattr(_local, 'connections'):
+        _local.connections = {}
+    connection = _local.connections.get(path)
+    if connection is None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        connection.executescript(JOURNAL_SCHEMA)
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(order_journal)')}
+        if 'rejected_reason' not in columns:
+            # Журнал создан до появления отклонённых заказов
+            connection.execute('ALTER TABLE order_journal ADD COLUMN rejected_reason TEXT')
+        _local.connections[path] = connection
+    return connection
+
+
+def append_order(order_data, tracking_id=None):
+    tracking_id = tracking_id or uuid.uuid4().hex
+    get_journal_connection().execute(
+        'INSERT INTO order_journal (tracking_id, payload, created_at) VALUES (?, ?, ?)',
+        (tracking_id, json.dumps(order_data, cls=DjangoJSONEncoder, ensure_ascii=False), time.time()),
+    )
+    return tracking_id
+
+
+def get_pending_orders(limit):
+    rows = get_journal_connection().execute(
+        'SELECT tracking_id, payload FROM order_journal WHERE drained_at IS NULL ORDER BY id LIMIT ?',
+        (limit,),
+    ).fetchall()
+    return [(tracking_id, json.loads(payload)) for tracking_id, payload in rows]
+
+
+def mark_drained(tracking_ids, rejected_reasons=None):
+    """Отмечает заказы перенесёнными, а заказы из rejected_reasons — отклонёнными."""
+    rejected_reasons = rejected_reasons or {}
+    connection = get_journal_connection()
+    drained_at = time.time()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.executemany(
+            'UPDATE order_journal SET drained_at = ?, rejected_reason = ? WHERE tracking_id = ?',
+            [(drained_at, rejected_reasons.get(tracking_id), tracking_id) for tracking_id in tracking_ids],
+        )
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def is_pending(tracking_id):
+    return get_journal_connection().execute(
+        'SELECT 1 FROM order_journal WHERE tracking_id = ? AND drained_at IS NULL',
+        (tracking_id,),
+    ).fetchone() is not None
+
+
+def get_rejected_reason(tracking_id):
+    row = get_journal_connection().execute(
+        'SELECT rejected_reason FROM order_journal WHERE tracking_id = ? AND rejected_reason IS NOT NULL',
+        (tracking_id,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def get_rejected_orders():
+    rows = get_journal_connection().execute(
+        'SELECT tracking_id, payload, rejected_reason FROM order_journal '
+        'WHERE rejected_reason IS NOT NULL ORDER BY id'
+    ).fetchall()
+    return [(tracking_id, json.loads(payload), reason) for tracking_id, payload, reason in rows]
+
+
+def get_pending_count():
+    return get_journal_connection().execute(
+        'SELECT COUNT(*) FROM order_journal WHERE drained_at IS NULL'
+    ).fetchone()[0]
+
+
+def purge_drained(older_than):
+    cursor = get_journal_connection().execute(
+        'DELETE FROM order_journal '
+        'WHERE drained_at IS NOT NULL AND drained_at < ? AND rejected_reason IS NULL',
+        (time.time() - older_than,),
+    )
+    return cursor.rowcount
+
+
+def drain_order_journal(batch_size=500):
+    """Переносит пачку заказов из журнала в базу и возвращает id созданных заказов.
+
+    Пустой список не значит, что журнал пуст: вся пачка могла оказаться
+    отклонённой или уже перенесённой. Остаток показывает get_pending_count.
+
+    Заказы и позиции создаются двумя bulk_create в одной транзакции.
+    Если процесс упадёт между коммитом в базу и отметкой в журнале,
+    при следующем запуске заказы найдутся по tracking_id и не задвоятся.
+
+    Товар могли удалить, пока заказ лежал в журнале. Такой заказ не
+    переносится, а остаётся в журнале отклонённым: менеджер увидит его
+    в drain_order_journal --rejected и свяжется с клиентом.
+    """
+    pending_orders = get_pending_orders(batch_size)
+    if not pending_orders:
+        return []
+
+    tracking_ids = [tracking_id for tracking_id, _ in pending_orders]
+    existing_product_ids = set(
+        Product.objects
+        .filter(pk__in={item['product'] for _, order_data in pending_orders for item in order_data['products']})
+        .values_list('pk', flat=True)
+    )
+    rejected_reasons = {}
+    with transaction.atomic():
+        created_tracking_ids = set(
+            Order.objects.filter(tracking_id__in=tracking_ids).values_list('tracking_id', flat=True)
+        )
+        new_orders = []
+        for tracking_id, order_data in pending_orders:
+            if tracking_id in created_tracking_ids:
+                continue
+            missing_product_ids = sorted(
+                {item['product'] for item in order_data['products']} - existing_product_ids
+            )
+            if missing_product_ids:
+                rejected_reasons[tracking_id] = (
+                    f'Товары удалены из меню: {", ".join(map(str, missing_product_ids))}'
+                )
+                continue
+            new_orders.append((tracking_id, order_data))
+        Order.objects.bulk_create([
+            Order(
+                tracking_id=tracking_id,
+                firstname=order_data['firstname'],
+                lastname=order_data['lastname'],
+                phonenumber=order_data['phonenumber'],
+                address=order_data['address'],
+                normalized_address=normalize_address(order_data['address']),
+            )
+            for tracking_id, order_data in new_orders
+        ])
+        order_ids = dict(
+            Order.objects
+            .filter(tracking_id__in=[tracking_id for tracking_id, _ in new_orders])
+            .values_list('tracking_id', 'id')
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order_id=order_ids[tracking_id],
+                product_id=item['product'],
+                quantity=item['quantity'],
+                price=item['price'],
+            )
+            for tracking_id, order_data in new_orders
+            for item in order_data['products']
+        ])
+        enqueue_unknown_addresses({order_data['address'] for _, order_data in new_orders})
+
+    mark_drained(tracking_ids, rejected_reasons)
+    for tracking_id, reason in rejected_reasons.items():
+        logger.warning('Заказ %s из журнала отклонён: %s', tracking_id, reason)
+    refresh_order_candidates(list(order_ids.values()))
+    return list(order_ids.values())
@@ -1,8 +1,28 @@
-from places.models import Place
-from utils.geocoder import get_coordinates
+import base64
+import binascii
+from datetime import datetime
 
+from django.db import transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
 
-def enrich_orders_with_restaurants(orders, menu_items, restaurant_objects):
+from foodcartapp.models import Order, OrderItem, OrderCandidateRestaurant, Restaurant, RestaurantMenuItem
+from places.models import PlaceDistance
+from utils.addresses import normalize_address
+from utils.distances import parse_coordinates
+from utils.geocoder import get_places
+from utils.geocoding_queue import enqueue_geocoding
+from utils.menu_index import RestaurantMenuIndex
+from utils.spatial import get_restaurant_grid
+
+
+def calculate_possible_restaurants(orders, menu_items, restaurant_objects, limit=None, persist=True):
+    """Заполняет order.possible_restaurants у каждого заказа.
+
+    limit по умолчанию — NEAREST_RESTAURANTS_LIMIT, 0 — все рестораны.
+    С persist=False ничего не пишет в базу: не ставит адреса в очередь
+    геокодирования и не сохраняет посчитанные расстояния.
+    """
     if not orders:
         return
 
@@ -10,26 +30,181 @@ def enrich_orders_with_restaurants(orders, menu_items, restaurant_objects):
     restaurant_addresses = {restaurant.address for restaurant in restaurant_objects.values() if getattr(restaurant, 'address', None)}
     all_addresses = order_addresses | restaurant_addresses
 
-    existing_places = Place.objects.filter(address__in=all_addresses)
-    address_to_coordinates = {place.address: place.coordinates for place in existing_places}
-
-    new_places_to_create = []
-    for address in all_addresses:
-        if address not in address_to_coordinates:
-            coordinates = get_coordinates(address)
-            if coordinates:
-                address_to_coordinates[address] = coordinates
-                new_places_to_create.append(Place(address=address, coordinates=coordinates))
-
-    if new_places_to_create:
-        Place.objects.bulk_create(new_places_to_create, ignore_conflicts=True)
+    places = get_places(all_addresses)
+    now = timezone.now()
+    if persist:
+        enqueue_geocoding(
+            address
+            for address, place in places.items()
+            if not place or not place.coordinates and place.can_lookup(now)
+        )
+    places = {address: place for address, place in places.items() if place}
+    address_to_coordinates = {address: place.coordinates for address, place in places.items()}
 
     for restaurant in restaurant_objects.values():
         if restaurant.address:
             restaurant.coordinates = restaurant.coordinates or address_to_coordinates.get(restaurant.address)
 
+    restaurant_points = {}
+    for restaurant_id, restaurant in restaurant_objects.items():
+        restaurant_coordinates = parse_coordinates(getattr(restaurant, 'coordinates', None))
+        if restaurant_coordinates:
+            restaurant_points[restaurant_id] = restaurant_coordinates
+
+    order_places = {places[order.address].id for order in orders if order.address in places}
+    place_distances = {}
+    for place_distance in PlaceDistance.objects.filter(place_id__in=order_places):
+        place_distances.setdefault(place_distance.place_id, {})[place_distance.restaurant_id] = place_distance.distance
+    cached_distances = {
+        (place_id, restaurant_id)
+        for place_id, distances in place_distances.items()
+        for restaurant_id in distances
+    }
+
+    restaurant_grid = get_restaurant_grid(restaurant_points)
+    menu_index = RestaurantMenuIndex(menu_items)
     for order in orders:
-        order_coordinates = address_to_coordinates.get(order.address)
+        place = places.get(order.address)
+        order_coordinates = parse_coordinates(place.coordinates) if place else None
         order.possible_restaurants = order.get_possible_restaurants(
-            menu_items, restaurant_objects, order_coordinates
+            menu_index,
+            restaurant_objects,
+            order_coordinates,
+            restaurant_grid,
+            place_distances.setdefault(place.id, {}) if place else None,
+            limit=limit,
+        )
+
+    if not persist:
+        return
+    PlaceDistance.objects.bulk_create(
+        [
+            PlaceDistance(place_id=place_id, restaurant_id=restaurant_id, distance=distance)
+            for place_id, distances in place_distances.items()
+            for restaurant_id, distance in distances.items()
+            if (place_id, restaurant_id) not in cached_distances
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def load_matching_data():
+    menu_items = list(
+        RestaurantMenuItem.objects.filter(availability=True)
+        .values('restaurant_id', 'product_id')
+    )
+    restaurant_objects = {r.id: r for r in Restaurant.objects.only('id', 'name', 'coordinates', 'address')}
+    return menu_items, restaurant_objects
+
+
+def refresh_order_candidates(order_ids):
+    orders = list(
+        Order.objects
+        .filter(pk__in=order_ids)
+        .only('id', 'address')
+        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.only('order_id', 'product_id')))
+    )
+    if not orders:
+        return
+
+    calculate_possible_restaurants(orders, *load_matching_data())
+
+    candidates = [
+        OrderCandidateRestaurant(
+            order=order,
+            restaurant_id=restaurant['id'],
+            distance=restaurant['distance'],
         )
+        for order in orders
+        for restaurant in order.possible_restaurants
+    ]
+    with transaction.atomic():
+        OrderCandidateRestaurant.objects.filter(order__in=orders).delete()
+        OrderCandidateRestaurant.objects.bulk_create(candidates)
+
+
+def get_all_order_candidates(orders, persist=True):
+    """Все рестораны, способные приготовить каждый заказ, с расстояниями.
+
+    В отличие от OrderCandidateRestaurant, список не обрезан до
+    NEAREST_RESTAURANTS_LIMIT — это нужно распределению заказов, чтобы
+    заказ не остался без ресторана, когда ближайшие заняты.
+    Возвращает {id заказа: [(id ресторана, км или None), ...]}.
+    """
+    prefetch_related_objects(
+        orders,
+        Prefetch('items', queryset=OrderItem.objects.only('order_id', 'product_id')),
+    )
+    calculate_possible_restaurants(orders, *load_matching_data(), limit=0, persist=persist)
+    return {
+        order.id: [(restaurant['id'], restaurant['distance']) for restaurant in order.possible_restaurants]
+        for order in orders
+    }
+
+
+def refresh_candidates_for_addresses(addresses):
+    address_keys = {normalize_address(address) for address in addresses}
+
+    if Restaurant.objects.filter(normalized_address__in=address_keys).exists():
+        return refresh_open_orders_candidates()
+
+    return refresh_open_orders_candidates(
+        Order.objects.filter(normalized_address__in=address_keys)
+    )
+
+
+def refresh_open_orders_candidates(orders=None, batch_size=500):
+    if orders is None:
+        orders = Order.objects.all()
+    order_ids = list(
+        orders.exclude(status=Order.STATUS_COMPLETED)
+        .values_list('id', flat=True)
+        .distinct()
+    )
+    for start in range(0, len(order_ids), batch_size):
+        refresh_order_candidates(order_ids[start:start + batch_size])
+    return len(order_ids)
+
+
+def enrich_orders_with_restaurants(orders):
+    for order in orders:
+        order.possible_restaurants = [
+            {
+                'id': candidate.restaurant_id,
+                'name': candidate.restaurant.name,
+                'distance': candidate.distance,
+            }
+            for candidate in order.candidate_restaurants.all()
+        ]
+
+
+def encode_order_cursor(order):
+    raw_cursor = f'{order.created_at.isoformat()}|{order.id}'
+    return base64.urlsafe_b64encode(raw_cursor.encode()).decode().rstrip('=')
+
+
+def decode_order_cursor(cursor):
+    try:
+        raw_cursor = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw_cursor.split('|')
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Некорректный cursor')
+
+
+def get_orders_page(orders, page_size, cursor=None):
+    """Страница заказов от новых к старым, начиная после cursor.
+
+    Порядок (-created_at, -id) совпадает с частичными индексами разделов
+    order_unprocessed_idx и order_active_idx, поэтому любая страница
+    читается одним коротким проходом по индексу, как бы далеко от начала
+    она ни была. Возвращает заказы и cursor следующей страницы.
+    """
+    orders = orders.order_by('-created_at', '-id')
+    if cursor:
+        created_at, order_id = decode_order_cursor(cursor)
+        orders = orders.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id))
+
+    page = list(orders[:page_size + 1])
+    next_cursor = encode_order_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
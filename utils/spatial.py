@@ -0,0 +1,111 @@
+import math
+
+from utils.distances import get_distance_matrix
+
+
+KM_PER_DEGREE = 111.195
+# Геодезическое расстояние на эллипсоиде бывает до 0,6% короче сферического,
+# поэтому нижнюю оценку расстояния до кольца берём с запасом
+RING_DISTANCE_MARGIN = 0.99
+
+_cached_grid = None
+
+
+class RestaurantGrid:
+    """Сетка из квадратов со стороной cell_size_km поверх координат ресторанов.
+
+    Поиск ближайших идёт по занятым квадратам в порядке удаления колец
+    вокруг точки заказа и останавливается, как только следующее кольцо
+    заведомо дальше найденных ресторанов или радиуса поиска.
+    """
+
+    def __init__(self, restaurant_points, cell_size_km=2.0):
+        self.restaurant_points = dict(restaurant_points)
+        self.cell_size_km = cell_size_km
+
+        # Масштаб долготы берём по самой далёкой от экватора широте: на ней
+        # градус долготы короче всего, и размер квадрата по долготе нигде
+        # не завышает реальное расстояние
+        max_latitude = max((abs(latitude) for latitude, _ in self.restaurant_points.values()), default=0)
+        self.longitude_scale = math.cos(math.radians(max_latitude))
+
+        self.cells = {}
+        for restaurant_id, point in self.restaurant_points.items():
+            self.cells.setdefault(self.get_cell(point), []).append(restaurant_id)
+
+    def get_cell(self, point):
+        latitude, longitude = point
+        row = math.floor(latitude * KM_PER_DEGREE / self.cell_size_km)
+        column = math.floor(longitude * KM_PER_DEGREE * self.longitude_scale / self.cell_size_km)
+        return row, column
+
+    def find_nearest(self, point, restaurant_ids=None, limit=None, radius_km=None, known_distances=None):
+        """Список пар (id ресторана, км) по возрастанию расстояния.
+
+        Уже известные расстояния берутся из known_distances, а недостающие
+        досчитываются и дописываются туда же.
+        """
+        if not self.cells:
+            return []
+        if known_distances is None:
+            known_distances = {}
+
+        if restaurant_ids is not None:
+            restaurant_ids = set(restaurant_ids)
+            if not restaurant_ids:
+                return []
+
+        # Обходим только занятые квадраты с подходящими ресторанами,
+        # сгруппированные по номеру кольца вокруг заказа: пустые кольца
+        # между заказом и далёкими ресторанами не перебираются
+        center = self.get_cell(point)
+        rings = {}
+        for (row, column), cell_restaurant_ids in self.cells.items():
+            matching_restaurant_ids = [
+                restaurant_id
+                for restaurant_id in cell_restaurant_ids
+                if restaurant_ids is None or restaurant_id in restaurant_ids
+            ]
+            if matching_restaurant_ids:
+                ring = max(abs(row - center[0]), abs(column - center[1]))
+                rings.setdefault(ring, []).extend(matching_restaurant_ids)
+
+        # Заказ севернее всех ресторанов: градус долготы у него ещё короче
+        point_scale = math.cos(math.radians(abs(point[0])))
+        ring_scale = min(1, point_scale / self.longitude_scale) * RING_DISTANCE_MARGIN
+
+        found = []
+        for ring in sorted(rings):
+            ring_min_distance = (ring - 1) * self.cell_size_km * ring_scale
+            if radius_km is not None and ring_min_distance > radius_km:
+                break
+            if limit and len(found) >= limit and ring_min_distance > found[limit - 1][1]:
+                break
+
+            ring_restaurant_ids = rings[ring]
+            unknown_restaurant_ids = [
+                restaurant_id
+                for restaurant_id in ring_restaurant_ids
+                if restaurant_id not in known_distances
+            ]
+            if unknown_restaurant_ids:
+                unknown_points = [self.restaurant_points[restaurant_id] for restaurant_id in unknown_restaurant_ids]
+                distances, = get_distance_matrix([point], unknown_points)
+                known_distances.update(zip(unknown_restaurant_ids, distances))
+
+            found.extend(
+                (restaurant_id, known_distances[restaurant_id])
+                for restaurant_id in ring_restaurant_ids
+                if radius_km is None or known_distances[restaurant_id] <= radius_km
+            )
+            found.sort(key=lambda restaurant: restaurant[1])
+
+        return found[:limit] if limit else found
+
+
+def get_restaurant_grid(restaurant_points):
+    global _cached_grid
+
+    if _cached_grid is None or _cached_grid.restaurant_points != restaurant_points:
+        _cached_grid = RestaurantGrid(restaurant_points)
+    return _cached_grid
@@ -0,0 +1,132 @@
+import itertools
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from utils.dispatch import UNKNOWN_DISTANCE_COST, assign_orders
+from utils.distances import get_distance_matrix
+from utils.spatial import RestaurantGrid
+
+
+class RestaurantGridTest(SimpleTestCase):
+    """Сетка находит те же рестораны, что и полный перебор."""
+
+    # Москва и Санкт-Петербург: широты сильно различаются
+    CITIES = [(55.75, 37.62), (59.94, 30.31)]
+
+    def setUp(self):
+        self.random = random.Random(2024)
+        self.restaurant_points = {
+            restaurant_id: self.get_random_point()
+            for restaurant_id in range(60)
+        }
+        self.grid = RestaurantGrid(self.restaurant_points)
+
+    def get_random_point(self, spread=0.3):
+        latitude, longitude = self.random.choice(self.CITIES)
+        return (
+            latitude + self.random.uniform(-spread, spread),
+            longitude + self.random.uniform(-spread * 2, spread * 2),
+        )
+
+    def find_nearest_brute_force(self, point, restaurant_ids, limit=None, radius_km=None):
+        points = [self.restaurant_points[restaurant_id] for restaurant_id in restaurant_ids]
+        distances, = get_distance_matrix([point], points)
+        found = sorted(
+            (distance for distance in distances if radius_km is None or distance <= radius_km),
+        )
+        return found[:limit] if limit else found
+
+    def assert_same_as_brute_force(self, queries_count, spread=0.5):
+        for _ in range(queries_count):
+            point = self.get_random_point(spread)
+            restaurant_ids = self.random.sample(sorted(self.restaurant_points), 30)
+            limit = self.random.choice([1, 3, 5, None])
+            radius_km = self.random.choice([None, 5, 20])
+
+            found = self.grid.find_nearest(point, restaurant_ids, limit=limit, radius_km=radius_km)
+            expected = self.find_nearest_brute_force(point, restaurant_ids, limit, radius_km)
+            self.assertEqual([distance for _, distance in found], expected, point)
+
+    def test_matches_brute_force(self):
+        self.assert_same_as_brute_force(2000)
+
+    def test_matches_brute_force_for_orders_north_of_restaurants(self):
+        self.assert_same_as_brute_force(500, spread=3)
+
+    @override_settings(DISTANCE_MODE='geodesic')
+    def test_matches_brute_force_with_geodesic_distances(self):
+        self.assert_same_as_brute_force(100)
+
+    def test_empty_restaurant_ids(self):
+        self.assertEqual(self.grid.find_nearest(self.CITIES[0], restaurant_ids=[]), [])
+
+
+class AssignOrdersTest(SimpleTestCase):
+    """Распределение совпадает с полным перебором на маленьких примерах."""
+
+    def setUp(self):
+        self.random = random.Random(2024)
+
+    def get_random_problem(self):
+        restaurant_ids = range(self.random.randint(1, 4))
+        order_candidates = {
+            order_id: [
+                (restaurant_id, self.random.choice([None, *range(1, 20)]))
+                for restaurant_id in restaurant_ids
+                if self.random.random() < 0.8
+            ]
+            for order_id in range(self.random.randint(1, 5))
+        }
+        capacities = {
+            restaurant_id: self.random.choice([0, 1, 1, 2, None])
+            for restaurant_id in restaurant_ids
+        }
+        return order_candidates, capacities
+
+    def get_cost(self, order_candidates, assignments):
+        distances = {
+            (order_id, restaurant_id): distance
+            for order_id, candidates in order_candidates.items()
+            for restaurant_id, distance in candidates
+        }
+        return sum(
+            UNKNOWN_DISTANCE_COST if distances[order_id, restaurant_id] is None else distances[order_id, restaurant_id]
+            for order_id, restaurant_id in assignments.items()
+        )
+
+    def assign_brute_force(self, order_candidates, capacities):
+        best = None
+        choices = [[None, *(restaurant_id for restaurant_id, _ in candidates)] for candidates in order_candidates.values()]
+        for restaurant_ids in itertools.product(*choices):
+            assignments = {
+                order_id: restaurant_id
+                for order_id, restaurant_id in zip(order_candidates, restaurant_ids)
+                if restaurant_id is not None
+            }
+            if any(
+                capacities[restaurant_id] is not None
+                and list(assignments.values()).count(restaurant_id) > capacities[restaurant_id]
+                for restaurant_id in assignments.values()
+            ):
+                continue
+            key = (-len(assignments), self.get_cost(order_candidates, assignments))
+            if best is None or key < best:
+                best = key
+        return best
+
+    def test_matches_brute_force(self):
+        for _ in range(300):
+            order_candidates, capacities = self.get_random_problem()
+            assignments = assign_orders(order_candidates, capacities, candidates_limit=100)
+            self.assertEqual(
+                (-len(assignments), self.get_cost(order_candidates, assignments)),
+                self.assign_brute_force(order_candidates, capacities),
+            )
+
+    def test_limited_candidates_assign_as_many_orders(self):
+        for _ in range(300):
+            order_candidates, capacities = self.get_random_problem()
+            assignments = assign_orders(order_candidates, capacities, candidates_limit=1)
+            best_count, _ = self.assign_brute_force(order_candidates, capacities)
+            self.assertEqual(len(assignments), -best_count)